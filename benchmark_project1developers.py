@@ -0,0 +1,398 @@
+"""Benchmarks for project1developers.py
+
+Benchmarks run against local fixture data, so no network access is needed.
+
+Mining: compares the git log backend against PyDriller on a generated
+fixture repository and checks that both return identical developers:
+
+    python benchmark_project1developers.py mining --commits 20000
+
+Similarity: runs preprocessing, blocking, scoring, filtering and writing
+on synthetic developer identities with planted duplicates, reports wall
+time and throughput per stage, the peak RSS of the run and precision/recall
+against the planted duplicates, and compares the results to a stored baseline:
+
+    python benchmark_project1developers.py similarity --save-baseline baseline.json
+    python benchmark_project1developers.py similarity --baseline baseline.json
+    python benchmark_project1developers.py similarity --sizes 100000 -b email
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+import project1developers as p1d
+
+FIRST_NAMES = ["Erkki", "Maija", "Tiina", "Pentti", "Väinö", "Aino", "Alex",
+               "Jian", "Li", "Nan", "Sandiyo", "Ömer", "José", "Zoë"]
+LAST_NAMES = ["Esimerkki", "Meikäläinen", "Tossavainen", "Virtanen", "Väinämöinen",
+              "Tran", "Guo", "Chen", "Elkins", "Sherwin", "Müller", "Núñez"]
+DOMAINS = ["gmail.com", "yritys.fi", "users.noreply.github.com", "example.com"]
+
+def fixture_identities(n, seed=0):
+    """Return n random (name, email) identities for fixture repositories."""
+    rng = random.Random(seed)
+    identities = []
+    for k in range(n):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        prefix = f"{first[0]}{last}{k}".lower()
+        identities.append((f"{first} {last}", f"{prefix}@{rng.choice(DOMAINS)}"))
+    return identities
+
+def create_fixture_repo(path, n_commits, n_identities=200, seed=0):
+    """Create a git repository at path with n_commits commits by random
+    authors and committers. Uses git fast-import, so large fixtures are quick."""
+    rng = random.Random(seed)
+    identities = fixture_identities(n_identities, seed)
+    subprocess.run(["git", "init", "--quiet", path], check=True)
+    lines = []
+    for k in range(1, n_commits + 1):
+        author, committer = rng.choice(identities), rng.choice(identities)
+        message = f"commit {k}\n".encode()
+        content = f"{k}\n".encode()
+        lines.append(b"commit refs/heads/master\n")
+        lines.append(f"mark :{k}\n".encode())
+        lines.append(f"author {author[0]} <{author[1]}> {1600000000 + k} +0000\n".encode())
+        lines.append(f"committer {committer[0]} <{committer[1]}> {1600000000 + k} +0000\n"
+                     .encode())
+        lines.append(f"data {len(message)}\n".encode() + message)
+        if k > 1:
+            lines.append(f"from :{k - 1}\n".encode())
+        lines.append(f"M 644 inline file{k % 10}.txt\ndata {len(content)}\n".encode()
+                     + content + b"\n")
+    subprocess.run(["git", "-C", path, "fast-import", "--quiet"],
+                   input=b"".join(lines), check=True)
+    subprocess.run(["git", "-C", path, "symbolic-ref", "HEAD", "refs/heads/master"],
+                   check=True)
+    return path
+
+def bench_mining(n_commits, n_identities, seed=0):
+    """Time both mining backends on a fixture repository.
+    Returns a dict of wall times in seconds and the number of developers."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = create_fixture_repo(os.path.join(tmp_dir, "repo"), n_commits,
+                                   n_identities, seed)
+        times = {}
+        results = {}
+        for backend in p1d.MINING_BACKENDS:
+            start = time.perf_counter()
+            results[backend] = p1d.get_developers_from_repo(path, backend)
+            times[backend] = time.perf_counter() - start
+    if results["git"] != results["pydriller"]:
+        raise AssertionError("Mining backends returned different developers")
+    return {"commits": n_commits, "developers": len(results["git"]), **times}
+
+# Pools of the synthetic identity generator, many developers share a first name
+GIVEN_NAMES = FIRST_NAMES + [
+    "Anna", "Mikko", "Sophie", "Lucas", "Hiroshi", "Yuki", "Priya", "Rahul", "Olga", "Dmitri",
+    "Fatima", "Ahmed", "Chloé", "François", "Jürgen", "Björn", "Åsa", "Søren", "Łukasz",
+    "Małgorzata", "Ioana", "Mehmet", "Ayşe", "João", "Inês", "Thanh", "Minh", "Wei", "Xiu",
+    "Kwame", "Amara", "Santiago", "Camila", "Niamh", "Siobhán", "Paulo", "Emeka", "Nguyễn",
+    "Daniel", "Sarah", "Michael", "Laura", "David", "Emma", "Thomas", "Julia", "Martin"]
+FAMILY_NAMES = LAST_NAMES + [
+    "Korhonen", "Nieminen", "Mäkinen", "Smith", "Johnson", "Schmidt", "Schneider", "Dubois",
+    "Lefèvre", "García", "Fernández", "Rossi", "Bianchi", "Kowalski", "Nowak", "Novák",
+    "Ivanov", "Petrova", "Yılmaz", "Öztürk", "Suzuki", "Takahashi", "Kim", "Park", "Wang",
+    "Zhang", "Singh", "Patel", "Nguyen", "Pham", "Silva", "Santos", "Andersson", "Hansen",
+    "Jensen", "O'Brien", "Murphy", "Okafor", "Mensah", "Haddad", "Cohen", "Papadopoulos"]
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvzšñç" for v in "aeiouyäöüé"]
+NOREPLY_DOMAIN = "users.noreply.github.com"
+ALIAS_STYLES = ("initials", "noreply", "ascii", "login", "reversed", "lowercase")
+STAGES = ("preprocess", "blocking", "scoring", "filter", "write")
+
+def _ascii(text):
+    """Strip accents, e.g. for email addresses."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+
+def _synthetic_name(rng, min_syllables, max_syllables):
+    return "".join(rng.choice(SYLLABLES)
+                   for _ in range(rng.randint(min_syllables, max_syllables))).capitalize()
+
+def _alias(rng, style, person_id, first, last, email):
+    """Return a (name, email) alias of a developer in the given style."""
+    prefix, domain = email.split("@")
+    login = _ascii(f"{first[0]}{last}").lower()
+    if style == "initials":
+        return f"{first[0]}. {last}", rng.choice([email, f"{login}@{rng.choice(DOMAINS)}"])
+    if style == "noreply":
+        return f"{first} {last}", f"{10000000 + person_id}+{login}@{NOREPLY_DOMAIN}"
+    if style == "ascii":
+        return _ascii(f"{first} {last}"), f"{prefix}@{rng.choice(DOMAINS)}"
+    if style == "login":
+        return login, email
+    if style == "reversed":
+        return f"{last}, {first}", email
+    return f"{first} {last}".lower(), f"{prefix}@{domain}.example"
+
+def synthetic_developers(n, seed=0, duplicate_rate=0.25):
+    """Return n unique developer [name, email] rows and the id of the person
+    behind each row. Rows with the same person id are planted duplicates.
+
+    Names are built from random (partly non-ASCII) syllables. A
+    duplicate_rate share of persons gets one to three aliases: initials,
+    GitHub noreply emails, ASCII-folded or lowercase names, logins as names
+    and "Last, First" names. Rows are shuffled.
+    """
+    rng = random.Random(seed)
+    rows, person_ids, seen = [], [], set()
+    person_id = 0
+    while len(rows) < n:
+        first = rng.choice(GIVEN_NAMES)
+        # Synthetic family names keep the identities unique at large sizes
+        if rng.random() < 0.5:
+            last = rng.choice(FAMILY_NAMES)
+        else:
+            last = _synthetic_name(rng, 2, 4)
+        if rng.random() < 0.1:
+            first = f"{first} {rng.choice(GIVEN_NAMES)}"
+        style = rng.randrange(3)
+        if style == 0:
+            prefix = f"{first}.{last}"
+        elif style == 1:
+            prefix = f"{first[0]}{last}"
+        else:
+            prefix = f"{first.split()[0]}{rng.randrange(1000)}"
+        email = f"{_ascii(prefix).replace(' ', '').lower()}@{rng.choice(DOMAINS)}"
+        # Many developers commit with a login instead of their full name
+        if rng.random() < 0.35:
+            identities = [(_synthetic_name(rng, 2, 4).lower() + str(rng.randrange(100)), email)]
+        else:
+            identities = [(f"{first} {last}", email)]
+        if rng.random() < duplicate_rate:
+            for style in rng.sample(ALIAS_STYLES, rng.randint(1, 3)):
+                identities.append(_alias(rng, style, person_id, first, last, email))
+        for identity in identities:
+            if identity not in seen and len(rows) < n:
+                seen.add(identity)
+                rows.append(list(identity))
+                person_ids.append(person_id)
+        person_id += 1
+    order = list(range(n))
+    rng.shuffle(order)
+    return [rows[i] for i in order], [person_ids[i] for i in order]
+
+def planted_pairs(person_ids):
+    """Index pairs (i, j), i < j, of rows of the same person."""
+    groups = {}
+    for i, person_id in enumerate(person_ids):
+        groups.setdefault(person_id, []).append(i)
+    return {(i, j) for members in groups.values()
+            for a, i in enumerate(members) for j in members[a + 1:]}
+
+def precision_recall(found, expected):
+    """Precision and recall of found index pairs against expected pairs."""
+    true_positives = len(found & expected)
+    precision = true_positives / len(found) if found else 1.0
+    recall = true_positives / len(expected) if expected else 1.0
+    return precision, recall
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (Linux reports KB),
+    None where the resource module is not available."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+@contextmanager
+def _chdir(path):
+    """Run the block in directory path and change back afterwards."""
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+def bench_similarity(n, seed=0, duplicate_rate=0.25, t=0.7, blocking="lossless",
+                     filtered_only=False, workers=1, chunk_size=p1d.CHUNK_SIZE):
+    """Run the similarity stages on n synthetic developers.
+
+    Scoring, filtering and writing are streamed in chunks like in
+    project1developers.main, and their times are summed over the chunks.
+    Returns a dict with the wall time and throughput (pairs/s) of each
+    stage, the peak RSS of the whole run (a high-water mark, so it is not
+    split by stage) and the precision and recall of the filtered pairs
+    against the planted duplicates.
+    """
+    devs, person_ids = synthetic_developers(n, seed, duplicate_rate)
+    total = n * (n - 1) // 2
+    stages = {stage: {"seconds": 0.0, "pairs": 0} for stage in STAGES}
+
+    start = time.perf_counter()
+    features = p1d.preprocess_developers(devs)
+    arrays = p1d.feature_arrays(features)
+    stages["preprocess"]["seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = None if blocking is None else p1d.candidate_pairs(features, blocking, t)
+    n_candidates = total if pairs is None else len(pairs)
+    stages["blocking"].update(seconds=time.perf_counter() - start,
+                              pairs=0 if pairs is None else total)
+
+    found = set()
+    # The PairResults path that project1developers.main takes with the python engine
+    frames = p1d.score_pair_chunks(features, pairs, arrays, chunk_size, workers,
+                                   t if filtered_only else None)
+    with tempfile.TemporaryDirectory() as tmp_dir, _chdir(tmp_dir):
+        p1d.ensure_output_folder()
+        write_all, close_all = p1d.open_all_pairs_writer("bench", "csv")
+        with open(os.path.join("project1devs", "bench_filtered.csv"), "w", newline="",
+                  encoding="utf-8") as filtered_file:
+            while True:
+                start = time.perf_counter()
+                results = next(frames, None)
+                stages["scoring"]["seconds"] += time.perf_counter() - start
+                if results is None:
+                    break
+                stages["scoring"]["pairs"] += len(results)
+
+                start = time.perf_counter()
+                filtered = results.filter(t)
+                stages["filter"]["seconds"] += time.perf_counter() - start
+                stages["filter"]["pairs"] += len(results)
+
+                start = time.perf_counter()
+                if not filtered_only:
+                    write_all(results.to_dataframe())
+                filtered.to_dataframe().to_csv(filtered_file, index=False,
+                                               header=not stages["write"]["pairs"])
+                stages["write"]["seconds"] += time.perf_counter() - start
+                stages["write"]["pairs"] += len(results)
+
+                found.update(zip(filtered.i.tolist(), filtered.j.tolist()))
+        close_all()
+    for timing in stages.values():
+        seconds = timing["seconds"]
+        timing["pairs_per_s"] = timing.pop("pairs") / seconds if seconds > 0 else 0.0
+
+    precision, recall = precision_recall(found, planted_pairs(person_ids))
+    settings = {"seed": seed, "duplicate_rate": duplicate_rate, "threshold": t,
+                "blocking": blocking, "filtered_only": filtered_only}
+    return {"settings": settings, "developers": n, "pairs": total, "candidates": n_candidates,
+            "matches": len(found), "precision": precision, "recall": recall,
+            "peak_rss_mb": _peak_rss_mb(), "stages": stages}
+
+def compare_to_baseline(results, baseline, tolerance=0.2, min_seconds=0.05):
+    """Return a list of regressions of results against baseline results.
+
+    A stage regressed if it is more than tolerance slower than the baseline
+    (stages faster than min_seconds are ignored as noise). Any change in
+    the matches, precision or recall is reported, so that speed work
+    cannot change the matching quality unnoticed.
+    """
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get(size)
+        if base is None:
+            continue
+        if base["settings"] != result["settings"]:
+            regressions.append(f"{size} developers: baseline was run with {base['settings']}")
+            continue
+        for key in ("matches", "precision", "recall"):
+            if abs(result[key] - base[key]) > 1e-9:
+                regressions.append(f"{size} developers: {key} changed "
+                                   f"from {base[key]:.4g} to {result[key]:.4g}")
+        for stage, timing in result["stages"].items():
+            base_seconds = base["stages"].get(stage, {}).get("seconds")
+            if base_seconds is None or timing["seconds"] < min_seconds:
+                continue
+            if timing["seconds"] > base_seconds * (1 + tolerance):
+                regressions.append(f"{size} developers: {stage} took {timing['seconds']:.3f} s, "
+                                   f"baseline {base_seconds:.3f} s")
+    return regressions
+
+def parse_args():
+    """Parse command-line arguments for the benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmarks for project1developers.py")
+    sub = parser.add_subparsers(dest="suite", required=True)
+
+    mining = sub.add_parser("mining", help="git log backend vs PyDriller")
+    mining.add_argument('--commits', type=int, nargs='+', default=[1000, 10000],
+                        help='Fixture repository sizes in commits (default: 1000 10000)')
+    mining.add_argument('--identities', type=int, default=500,
+                        help='Distinct identities in the fixtures (default: 500)')
+
+    similarity = sub.add_parser("similarity", help="Similarity stages on synthetic developers")
+    similarity.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                            help='Numbers of developers (default: 1000 10000)')
+    similarity.add_argument('--seed', type=int, default=0,
+                            help='Seed of the developer generator (default: 0)')
+    similarity.add_argument('--duplicates', type=float, default=0.25,
+                            help='Share of developers with planted aliases (default: 0.25)')
+    similarity.add_argument('-t', '--threshold', type=float, default=0.9,
+                            help='Similarity threshold (default: 0.9)')
+    similarity.add_argument('-b', '--blocking', default='lossless',
+                            choices=p1d.BLOCKING_MODES + ("none",),
+                            help='Blocking mode, "none" scores all pairs (default: lossless)')
+    similarity.add_argument('--filtered-only', action='store_true',
+                            help='Only score and write the filtered pairs')
+    similarity.add_argument('-w', '--workers', type=int, default=1,
+                            help='Processes used for scoring (default: 1)')
+    similarity.add_argument('--baseline', metavar='PATH',
+                            help='Compare the results to a baseline JSON file')
+    similarity.add_argument('--save-baseline', metavar='PATH',
+                            help='Save the results as a baseline JSON file')
+    similarity.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed slowdown per stage (default: 0.2)')
+    return parser.parse_args()
+
+def run_similarity(args):
+    """Run the similarity suite, each size in a fresh process so that the
+    peak RSS is measured per size. Returns the exit status."""
+    blocking = None if args.blocking == "none" else args.blocking
+    results = {}
+    print(f"{'devs':>7} {'stage':>10} {'time (s)':>9} {'pairs/s':>12}")
+    for n in args.sizes:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(bench_similarity, n, args.seed, args.duplicates,
+                                 args.threshold, blocking, args.filtered_only,
+                                 args.workers).result()
+        results[str(n)] = result
+        for stage in STAGES:
+            timing = result["stages"][stage]
+            pairs_per_s = f"{timing['pairs_per_s']:.0f}" if timing["pairs_per_s"] else "-"
+            print(f"{n:>7} {stage:>10} {timing['seconds']:>9.3f} {pairs_per_s:>12}")
+        peak_rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f} MB"
+        print(f"{n:>7} candidates {result['candidates']} of {result['pairs']}, "
+              f"matches {result['matches']}, precision {result['precision']:.4f}, "
+              f"recall {result['recall']:.4f}, overall peak RSS {peak_rss}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return status
+
+def main():
+    """Run the selected benchmark suite and print the results."""
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args()
+    if args.suite == "mining":
+        print(f"{'commits':>8} {'devs':>6} {'git (s)':>9} {'pydriller (s)':>14} {'speedup':>8}")
+        for n_commits in args.commits:
+            result = bench_mining(n_commits, args.identities)
+            print(f"{result['commits']:>8} {result['developers']:>6} {result['git']:>9.3f} "
+                  f"{result['pydriller']:>14.3f} {result['pydriller'] / result['git']:>7.1f}x")
+    elif args.suite == "similarity":
+        sys.exit(run_similarity(args))
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,74 @@ if their email address is identical or if at least two other conditions are true
 """
 
 import csv
+import gzip
 import unicodedata
 import string
-from itertools import combinations
+import math
+import bisect
+from array import array
+from itertools import combinations, groupby, islice
+from operator import itemgetter
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import os
 import logging
 import argparse
+import subprocess
+import json
+import hashlib
+import heapq
+import re
+import shutil
+import tempfile
+import time
+import threading
+import zlib
+import cProfile
+import importlib
+import asyncio
+from http import HTTPStatus
+import mmap
+import struct
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 from Levenshtein import ratio as sim
-import pandas as pd
-from pydriller import Repository
+import numpy as np
+from rapidfuzz.process import cpdist
+from rapidfuzz.distance import Indel
+
+class _LazyImport:
+    """Stand-in for a module, or a name in it, imported on first use.
+
+    pandas and PyDriller (which loads GitPython) take most of the import
+    time, and many runs only need one of them. On first use, the stand-in
+    replaces itself in the module globals with the imported object.
+    """
+
+    def __init__(self, global_name, module, attr=None):
+        self._global_name = global_name
+        self._module = module
+        self._attr = attr
+
+    def _load(self):
+        obj = importlib.import_module(self._module)
+        if self._attr is not None:
+            obj = getattr(obj, self._attr)
+        if globals().get(self._global_name) is self:
+            globals()[self._global_name] = obj
+        return obj
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+pd = _LazyImport("pd", "pandas")
+Repository = _LazyImport("Repository", "pydriller", "Repository")
 
 def setup_logging():
     """Setup for logger"""
@@ -25,42 +84,510 @@ def setup_logging():
     )
     logging.getLogger("pydriller").setLevel(logging.WARNING)
 
-def get_developers_from_repo(repo_url):
-    """Fetch unique name, email pairs from a Git repository using PyDriller."""
+class NullProfiler:
+    """Profiler that records nothing. Used when --profile is off,
+    so the instrumented code only pays for a method call per stage."""
+    enabled = False
+
+    def stage(self, name):
+        """Context manager timing a stage of the run."""
+        return nullcontext()
+
+    def timed(self, iterable, name):
+        """Charge the time spent producing the items of iterable to a stage."""
+        return iterable
+
+    def count(self, name, n=1):
+        """Add n to an item counter."""
+
+    def hot_loop(self):
+        """Context manager running cProfile if a pstats file was requested."""
+        return nullcontext()
+
+class StageProfiler(NullProfiler):
+    """Records wall time, CPU time and peak memory per stage, and item counts.
+
+    Stages can nest (e.g. scoring inside writing), each stage is charged
+    its exclusive time only. CPU time is of this process, worker processes
+    are not included. Peak memory is the high-water mark of the process
+    RSS when the stage was last left.
+    """
+    enabled = True
+
+    def __init__(self, pstats_path=None):
+        self.pstats_path = pstats_path
+        self.stages = {}
+        self.counts = {}
+        # Counts can come from mining threads
+        self._count_lock = threading.Lock()
+        self._stack = []
+        self._start = self._last = (time.perf_counter(), time.process_time())
+
+    def _charge(self):
+        now = (time.perf_counter(), time.process_time())
+        if self._stack:
+            stage = self.stages[self._stack[-1]]
+            stage["wall_s"] += now[0] - self._last[0]
+            stage["cpu_s"] += now[1] - self._last[1]
+        self._last = now
+
+    def _enter(self, name):
+        self._charge()
+        if name not in self.stages:
+            self.stages[name] = {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "peak_rss_mb": None}
+        self.stages[name]["calls"] += 1
+        self._stack.append(name)
+
+    def _exit(self):
+        self._charge()
+        name = self._stack.pop()
+        if resource is not None:
+            # Linux reports KB
+            self.stages[name]["peak_rss_mb"] = \
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    @contextmanager
+    def stage(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, iterable, name):
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def count(self, name, n=1):
+        with self._count_lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def hot_loop(self):
+        if self.pstats_path is None:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(self.pstats_path)
+            logging.info('Saved hot loop profile to "%s"', os.path.basename(self.pstats_path))
+
+    def report(self):
+        """Return the stages, counts and pair scoring rate as a dict."""
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+        scoring = self.stages.get("scoring", {}).get("wall_s")
+        pairs = self.counts.get("pairs_scored")
+        return {"total_wall_s": wall, "total_cpu_s": cpu, "stages": self.stages,
+                "counts": self.counts,
+                "pairs_per_s": pairs / scoring if pairs and scoring else None}
+
+    def save(self, path):
+        """Write the report as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        logging.info('Saved profile report to "%s"', os.path.basename(path))
+
+# Profiler of the current run, replaced by main() with --profile
+_PROFILER = NullProfiler()
+
+def set_profiler(profiler):
+    """Set the profiler used by the instrumented stages, returns the previous one."""
+    global _PROFILER
+    previous, _PROFILER = _PROFILER, profiler
+    return previous
+
+# Backends for mining developers from a repository
+MINING_BACKENDS = ("git", "pydriller")
+
+# Format of git log output: author and committer name, email, NUL separated
+GIT_LOG_FORMAT = "%an%x00%ae%x00%cn%x00%ce"
+
+def is_remote_repo(repo_url):
+    """Whether repo_url is a remote URL (same rule as PyDriller), or a
+    file:// URL which git clones like a remote one."""
+    return repo_url.startswith(("git@", "https://", "http://", "git://", "file://"))
+
+def iter_git_log_identities(repo_path, rev="HEAD"):
+    """Stream (name, email) of authors and committers of each commit from git log.
+
+    Only the four identity fields are read, no commit objects are built.
+    Commits are walked from rev like PyDriller does; .mailmap is not applied.
+    Raises RuntimeError if git log fails.
+    """
+    cmd = ["git", "-C", repo_path, "-c", "log.mailmap=false", "log",
+           "--no-color", f"--format={GIT_LOG_FORMAT}", rev, "--"]
+    commits = 0
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        for line in proc.stdout:
+            fields = line.rstrip(b"\n").decode("utf-8", "replace").split("\x00")
+            if len(fields) == 4:
+                commits += 1
+                yield fields[0], fields[1]
+                yield fields[2], fields[3]
+        _PROFILER.count("commits", commits)
+        stderr = proc.stderr.read().decode("utf-8", "replace").strip()
+        if proc.wait() != 0:
+            raise RuntimeError(f"git log failed: {stderr}")
+
+# Partial clone filter: only commits are fetched, no trees or blobs
+CLONE_FILTER = "tree:0"
+
+# Default size limit of the clone cache in MB
+CLONE_CACHE_SIZE_MB = 2048
+
+def clone_repo(repo_url, path):
+    """Bare clone of repo_url into path with commit metadata only.
+    Servers that do not support partial clones send a full clone."""
+    subprocess.run(["git", "clone", "--bare", "--quiet", f"--filter={CLONE_FILTER}",
+                    repo_url, path], check=True, capture_output=True)
+
+def fetch_repo(path):
+    """Update the branches and tags of a bare clone from its origin.
+    Only the new commits are downloaded, with the filter of the clone."""
+    subprocess.run(["git", "-C", path, "fetch", "--quiet", "--prune", "--force", "origin",
+                    "refs/heads/*:refs/heads/*", "refs/tags/*:refs/tags/*"],
+                   check=True, capture_output=True)
+
+def directory_size(path):
+    """Total size in bytes of the files under path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+class CloneCache:
+    """Persistent bare clones of remote repositories, keyed by URL.
+
+    A repository is cloned on first use and updated with git fetch on
+    later runs, so only new commits are downloaded. When the clones grow
+    over max_mb, the least recently used ones are removed. The URL, last
+    use and size of each clone are kept in clones.json in cache_dir.
+    """
+    INDEX = "clones.json"
+
+    def __init__(self, cache_dir, max_mb=CLONE_CACHE_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # Mining threads share the cache
+        self._lock = threading.Lock()
+        self._in_use = {}
+
+    def clone_path(self, repo_url):
+        """Directory of the clone: repository name and a hash of the URL."""
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", repo_url.rstrip("/").rsplit("/", 1)[-1])
+        key = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name[:40]}-{key}")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        path = os.path.join(self.cache_dir, self.INDEX)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def _update(self, repo_url, path):
+        """Fetch into an existing clone, or clone the repository. A clone
+        that cannot be updated is cloned again."""
+        if os.path.isdir(path):
+            try:
+                fetch_repo(path)
+                logging.info("Updated cached clone of %s", repo_url)
+                return
+            except subprocess.CalledProcessError as e:
+                logging.warning("Failed to update cached clone of %s, cloning again: %s",
+                                repo_url, e.stderr.decode("utf-8", "replace").strip())
+                shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Clone next to the cache entry so an interrupted clone is never used
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as tmp_dir:
+            clone_repo(repo_url, os.path.join(tmp_dir, "repo.git"))
+            os.replace(os.path.join(tmp_dir, "repo.git"), path)
+        logging.info("Cloned %s into the clone cache", repo_url)
+
+    @contextmanager
+    def repo(self, repo_url):
+        """Yield the path of an up-to-date clone of repo_url. The clone is
+        not evicted while in use."""
+        path = self.clone_path(repo_url)
+        with self._lock:
+            self._in_use[path] = self._in_use.get(path, 0) + 1
+        try:
+            self._update(repo_url, path)
+            with self._lock:
+                index = self._load_index()
+                index[os.path.basename(path)] = {"url": repo_url, "last_used": time.time(),
+                                                 "bytes": directory_size(path)}
+                self._save_index(index)
+            yield path
+        finally:
+            with self._lock:
+                self._in_use[path] -= 1
+                if not self._in_use[path]:
+                    del self._in_use[path]
+                self.evict()
+
+    def evict(self):
+        """Remove the least recently used clones until the cache fits
+        max_mb. Clones in use are kept. Returns the removed URLs."""
+        index = self._load_index()
+        index = {name: entry for name, entry in index.items()
+                 if os.path.isdir(os.path.join(self.cache_dir, name))}
+        total = sum(entry["bytes"] for entry in index.values())
+        removed = []
+        for name, entry in sorted(index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            path = os.path.join(self.cache_dir, name)
+            if path in self._in_use:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= entry["bytes"]
+            removed.append(entry["url"])
+            del index[name]
+            logging.info("Evicted cached clone of %s (%.1f MB)",
+                         entry["url"], entry["bytes"] / 1024 / 1024)
+        if os.path.isdir(self.cache_dir):
+            self._save_index(index)
+        return removed
+
+@contextmanager
+def local_repo(repo_url, clone_cache=None):
+    """Yield a local path of the repository. Remote repositories are
+    cloned with commit metadata only, into clone_cache if given and into
+    a temporary bare repository otherwise."""
+    if not is_remote_repo(repo_url):
+        yield repo_url
+        return
+    if clone_cache is not None:
+        with clone_cache.repo(repo_url) as path:
+            yield path
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clone_path = os.path.join(tmp_dir, "repo.git")
+        clone_repo(repo_url, clone_path)
+        yield clone_path
+
+def _get_developers_from_git_log(repo_url, clone_cache=None):
+    """Unique name, email pairs from git log."""
+    with local_repo(repo_url, clone_cache) as path:
+        return set(iter_git_log_identities(path))
+
+def _git(repo_path, *args):
+    """Run a git command in repo_path and return its stripped output."""
+    result = subprocess.run(["git", "-C", repo_path, *args], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.strip()
+
+def watermark_path(outputfile):
+    """Path of the mining watermark stored next to the developers CSV."""
+    return os.path.join("project1devs", f"{outputfile}.watermark.json")
+
+def load_watermark(outputfile):
+    """Load the mining watermark, or None if there is none."""
+    path = watermark_path(outputfile)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_watermark(watermark, outputfile):
+    """Save the mining watermark next to the developers CSV."""
+    ensure_output_folder()
+    with open(watermark_path(outputfile), "w", encoding="utf-8") as f:
+        json.dump(watermark, f, ensure_ascii=False)
+
+def get_developers_incremental(repo_url, watermark=None, clone_cache=None):
+    """Fetch unique name, email pairs, walking only commits after the watermark.
+
+    The watermark holds the last processed commit per branch and the known
+    identities of a previous run on the same repository. If the previous
+    commit is no longer in the history (e.g. after a force push), the whole
+    history is walked again.
+    Returns the sorted developers and the new watermark.
+    """
+    if watermark is not None and watermark.get("repo") != repo_url:
+        logging.info("Watermark is for another repository, mining full history")
+        watermark = None
+    with local_repo(repo_url, clone_cache) as path:
+        head = _git(path, "rev-parse", "HEAD")
+        branch = _git(path, "rev-parse", "--symbolic-full-name", "HEAD") or "HEAD"
+        devs = set()
+        rev = head
+        if watermark is not None:
+            last = watermark["branches"].get(branch)
+            is_ancestor = last is not None and subprocess.run(
+                ["git", "-C", path, "merge-base", "--is-ancestor", last, head],
+                capture_output=True, check=False).returncode == 0
+            if is_ancestor:
+                devs = {tuple(dev) for dev in watermark["identities"]}
+                rev = f"{last}..{head}"
+                logging.info("Mining commits %s..%s", last[:10], head[:10])
+            else:
+                logging.info("Watermark commit not found on %s, mining full history", branch)
+        known = len(devs)
+        devs.update(iter_git_log_identities(path, rev))
+
+    branches = dict(watermark["branches"]) if watermark is not None else {}
+    branches[branch] = head
+    devs_sorted = sorted(devs)
+    logging.info("Found %d unique developer entries, %d new",
+                 len(devs_sorted), len(devs_sorted) - known)
+    return devs_sorted, {"repo": repo_url, "branches": branches,
+                         "identities": [list(dev) for dev in devs_sorted]}
+
+def get_developers_from_repo(repo_url, backend="git", clone_cache=None):
+    """Fetch unique name, email pairs from a Git repository.
+
+    The "git" backend streams only the identity fields from git log and
+    falls back to PyDriller if it fails. The "pydriller" backend builds
+    full PyDriller commit objects. clone_cache is a CloneCache reused for
+    remote repositories by the git backend.
+    """
     logging.info("Fetching developers from repository: %s", repo_url)
-    devs = set()
-    try:
-        for commit in Repository(repo_url).traverse_commits():
-            devs.add((commit.author.name, commit.author.email))
-            devs.add((commit.committer.name, commit.committer.email))
-    except Exception as e:
-        logging.error("Failed to fetch repository %s", e)
+    if backend not in MINING_BACKENDS:
+        raise ValueError(f"Unknown mining backend: {backend}")
+    devs = None
+    if backend == "git":
+        try:
+            devs = _get_developers_from_git_log(repo_url, clone_cache)
+        except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+            logging.warning("git log mining failed, falling back to PyDriller: %s", e)
+
+    if devs is None:
+        devs = set()
+        try:
+            for commit in Repository(repo_url).traverse_commits():
+                devs.add((commit.author.name, commit.author.email))
+                devs.add((commit.committer.name, commit.committer.email))
+                _PROFILER.count("commits")
+        except Exception as e:
+            logging.error("Failed to fetch repository %s", e)
 
     devs_sorted = sorted(devs)
     logging.info("Found %d unique developer entries", len(devs_sorted))
     return devs_sorted
 
-def save_developers_to_csv(devs, outputfile):
+def save_developers_to_csv(devs, outputfile, header=("name", "email")):
     """Saves name, email pairs to a CSV file."""
     # creates project1devs folder if it doesn't exists
     ensure_output_folder()
     with open(os.path.join("project1devs", f"{outputfile}.csv"),
               'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile, delimiter=',', quotechar='"')
-        writer.writerow(["name", "email"])
+        writer.writerow(header)
         writer.writerows(devs)
     logging.info('Saved developers to "%s"', f"{outputfile}.csv")
 
-def load_developers_from_repo(repo_url, outputfile):
+def load_developers_from_repo(repo_url, outputfile, backend="git", incremental=False,
+                              clone_cache=None):
     """
-    calls get_developers_from_repo and then save_developers_to_csv
+    calls get_developers_from_repo and then save_developers_to_csv.
+    With incremental, only commits after the watermark of the previous run are
+    walked (git backend only) and the watermark is updated.
     """
     logging.info("Loading developers from repository...")
-    devs = get_developers_from_repo(repo_url)
+    if incremental and backend == "git":
+        devs, watermark = get_developers_incremental(repo_url, load_watermark(outputfile),
+                                                     clone_cache)
+        save_watermark(watermark, outputfile)
+    else:
+        if incremental:
+            logging.warning("Incremental mining needs the git backend, mining full history")
+        devs = get_developers_from_repo(repo_url, backend, clone_cache)
     if not devs:
         raise ValueError("No developers found. Repository URL might be invalid.")
     save_developers_to_csv(devs, outputfile)
 
+# Repositories mined at the same time by load_developers_from_repos
+MINING_WORKERS = 4
+
+def read_repo_manifest(path):
+    """Repository URLs or paths from a manifest file, one per line.
+    Empty lines and lines starting with # are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def _mine_repository(repo_url, backend, clone_cache=None):
+    """Pool task: developers of one repository and the time it took."""
+    start = time.perf_counter()
+    devs = get_developers_from_repo(repo_url, backend, clone_cache)
+    if not devs:
+        raise ValueError("no developers found")
+    return devs, time.perf_counter() - start
+
+def mine_repositories(repo_urls, backend="git", workers=MINING_WORKERS, clone_cache=None):
+    """Mine several repositories in a thread pool (mining waits on git).
+
+    A failing repository is logged and skipped, the others are mined.
+    Returns the pooled developers as sorted (name, email, repos) rows,
+    repos being the repositories of the identity joined by ";", and
+    a dict of (developers, seconds, error) per repository.
+    """
+    repo_urls = list(dict.fromkeys(repo_urls))
+    pool = {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(_mine_repository, repo_url, backend, clone_cache): repo_url
+                   for repo_url in repo_urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            repo_url = futures[future]
+            try:
+                devs, seconds = future.result()
+            except Exception as e:
+                logging.error("[%d/%d] Failed to mine %s: %s", done, len(repo_urls), repo_url, e)
+                results[repo_url] = (0, None, str(e))
+                continue
+            logging.info("[%d/%d] Mined %s: %d developers in %.2f s",
+                         done, len(repo_urls), repo_url, len(devs), seconds)
+            results[repo_url] = (len(devs), seconds, None)
+            for dev in devs:
+                pool.setdefault(tuple(dev), set()).add(repo_url)
+
+    # Repositories are listed in the given order
+    order = {repo_url: k for k, repo_url in enumerate(repo_urls)}
+    rows = [[name, email, ";".join(sorted(repos, key=order.get))]
+            for (name, email), repos in sorted(pool.items())]
+    failed = sum(error is not None for _, _, error in results.values())
+    logging.info("Pooled %d unique developer entries from %d repositories, %d failed",
+                 len(rows), len(repo_urls) - failed, failed)
+    return rows, {repo_url: results[repo_url] for repo_url in repo_urls}
+
+def load_developers_from_repos(repo_urls, outputfile, backend="git", incremental=False,
+                               workers=MINING_WORKERS, clone_cache=None):
+    """Mine several repositories concurrently into one pooled CSV with
+    name, email and repos columns. Incremental mining is per repository
+    and not supported here, the histories are mined in full."""
+    logging.info("Loading developers from %d repositories...", len(repo_urls))
+    if incremental:
+        logging.warning("Incremental mining needs a single repository, mining full histories")
+    rows, _ = mine_repositories(repo_urls, backend, workers, clone_cache)
+    if not rows:
+        raise ValueError("No developers found. Repository URLs might be invalid.")
+    save_developers_to_csv(rows, outputfile, header=("name", "email", "repos"))
+
 def read_developers(filename):
     """Reads an existing CVS file of developers with name,dev columns."""
     logging.info("Reading existing CSV file of developers")
@@ -71,21 +598,28 @@ def read_developers(filename):
               'r', newline='', encoding='utf-8') as csvfile:
         reader = csv.reader(csvfile, delimiter=',')
         for row in reader:
-            devs.append(row)
+            # Pooled CSVs also have a repos column
+            devs.append(row[:2])
     return devs[1:]   # First element is header, skip
 
+# Translation table for removing punctuation, built once
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
 def process(dev):
     """Function for pre-processing each name,email"""
     name: str = dev[0]
 
     # Remove punctuation
-    trans = name.maketrans("", "", string.punctuation)
-    name = name.translate(trans)
-    # Remove accents, diacritics
-    name = unicodedata.normalize('NFKD', name)
-    name = ''.join([c for c in name if not unicodedata.combining(c)])
-    # Lowercase
-    name = name.casefold()
+    name = name.translate(PUNCTUATION_TABLE)
+    # ASCII fast path: no accents or diacritics to remove, lower() equals casefold()
+    if name.isascii():
+        name = name.lower()
+    else:
+        # Remove accents, diacritics
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join([c for c in name if not unicodedata.combining(c)])
+        # Lowercase
+        name = name.casefold()
     # Strip whitespace
     name = " ".join(name.split())
 
@@ -112,22 +646,700 @@ def process(dev):
 
     return name, first, last, i_first, i_last, email, prefix
 
-def compute_similarity(devs):
-    """Compute similarity between all possible pairs"""
+class DeveloperFeatures:
+    """Pre-processed developers stored as parallel lists.
+
+    Each developer is processed once, pair scoring then works on
+    indices into the lists.
+    """
+    __slots__ = ("raw_names", "names", "firsts", "lasts",
+                 "i_firsts", "i_lasts", "emails", "prefixes")
+
+    def __init__(self, devs):
+        self.raw_names = [dev[0] for dev in devs]
+        processed = [process(dev) for dev in devs]
+        (self.names, self.firsts, self.lasts, self.i_firsts,
+         self.i_lasts, self.emails, self.prefixes) = (
+            [list(field) for field in zip(*processed)] if processed
+            else [[] for _ in range(7)])
+
+    def __len__(self):
+        return len(self.raw_names)
+
+    def processed(self, i):
+        """Return the process() output of developer i."""
+        return (self.names[i], self.firsts[i], self.lasts[i], self.i_firsts[i],
+                self.i_lasts[i], self.emails[i], self.prefixes[i])
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Table from already processed columns, in __slots__ order."""
+        features = cls.__new__(cls)
+        for field, column in zip(cls.__slots__, columns):
+            setattr(features, field, column)
+        return features
+
+class DeveloperList(list):
+    """Developers with their DeveloperFeatures table, as loaded from a
+    snapshot, so that they are not processed again."""
+
+    def __init__(self, devs, features):
+        super().__init__(devs)
+        self.features = features
+
+def preprocess_developers(devs):
+    """Pre-process developers once into a DeveloperFeatures table.
+    An existing table, or the table of a DeveloperList, is returned as is."""
+    if isinstance(devs, DeveloperFeatures):
+        return devs
+    if isinstance(devs, DeveloperList):
+        return devs.features
+    return DeveloperFeatures(devs)
+
+# Binary snapshot of the preprocessed developers: magic, header length,
+# JSON header, then each DeveloperFeatures column as NUL-joined UTF-8
+SNAPSHOT_MAGIC = b"P1DSNAP\x00"
+# Bump when process() changes so that snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+def snapshot_path(filename):
+    """Path of the developer snapshot stored next to the developers CSV."""
+    return os.path.join("project1devs", f"{filename}.snapshot")
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_snapshot(features, filename):
+    """Save a DeveloperFeatures table of <filename>.csv as a binary snapshot.
+    The size, mtime and SHA-1 of the CSV are stored to detect changes.
+    Values containing NUL cannot be stored, then no snapshot is written.
+    Returns whether the snapshot was written."""
+    columns = [getattr(features, field) for field in DeveloperFeatures.__slots__]
+    if any("\x00" in value for column in columns for value in column):
+        logging.warning("Developers contain NUL characters, no snapshot saved")
+        return False
+    blobs = [b"\x00".join(value.encode("utf-8") for value in column) for column in columns]
+    csv_path = os.path.join("project1devs", f"{filename}.csv")
+    stat = os.stat(csv_path)
+    header = json.dumps({"version": SNAPSHOT_VERSION, "n": len(features),
+                         "csv": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                 "sha1": _file_sha1(csv_path)},
+                         "lengths": [len(blob) for blob in blobs]}).encode("utf-8")
+    path = snapshot_path(filename)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack("<I", len(header)) + header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(f"{path}.tmp", path)
+    logging.info('Saved developer snapshot to "%s"', os.path.basename(path))
+    return True
+
+def load_snapshot(filename):
+    """Load the DeveloperFeatures table of <filename>.csv from its snapshot.
+
+    The snapshot is memory-mapped and only used if the CSV has the same
+    size and mtime, or else the same SHA-1, as when it was saved.
+    Returns None if there is no valid snapshot.
+    """
+    path = snapshot_path(filename)
+    csv_path = os.path.join("project1devs", f"{filename}.csv")
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    try:
+        # mmap raises ValueError for an empty file
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _read_snapshot(data, csv_path)
+    except (ValueError, KeyError, TypeError, struct.error) as e:
+        logging.warning('Ignoring corrupt developer snapshot "%s": %s',
+                        os.path.basename(path), e)
+        return None
+
+def _read_snapshot(data, csv_path):
+    """Parse snapshot data, see load_snapshot. Returns None if the CSV changed
+    and raises ValueError (or KeyError, TypeError, struct.error) if the data
+    is corrupt."""
+    start = len(SNAPSHOT_MAGIC) + 4
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("bad magic")
+    (header_length,) = struct.unpack("<I", data[len(SNAPSHOT_MAGIC):start])
+    header = json.loads(data[start:start + header_length].decode("utf-8"))
+    if header["version"] != SNAPSHOT_VERSION:
+        return None
+    lengths, n = header["lengths"], header["n"]
+    if len(lengths) != len(DeveloperFeatures.__slots__) or \
+            start + header_length + sum(lengths) != len(data):
+        raise ValueError("truncated or malformed data")
+    stat = os.stat(csv_path)
+    saved = header["csv"]
+    if stat.st_size != saved["size"]:
+        return None
+    if stat.st_mtime_ns != saved["mtime_ns"] and _file_sha1(csv_path) != saved["sha1"]:
+        return None
+    offset = start + header_length
+    columns = []
+    for length in lengths:
+        blob = data[offset:offset + length].decode("utf-8")
+        column = blob.split("\x00") if n else []
+        if len(column) != n:
+            raise ValueError("column length does not match the header")
+        columns.append(column)
+        offset += length
+    return DeveloperFeatures.from_columns(columns)
+
+def read_developers_snapshot(filename):
+    """read_developers through the binary snapshot: the developers and their
+    DeveloperFeatures are loaded from it if the CSV is unchanged, else the
+    CSV is read and processed and the snapshot saved. Returns a DeveloperList."""
+    features = load_snapshot(filename)
+    if features is not None:
+        logging.info("Read developers from snapshot")
+        return DeveloperList([[name, email] for name, email
+                              in zip(features.raw_names, features.emails)], features)
+    devs = read_developers(filename)
+    features = DeveloperFeatures(devs)
+    save_snapshot(features, filename)
+    return DeveloperList(devs, features)
+
+# Blocking modes for candidate generation:
+#  - "keys": heuristic blocking on shared keys, fast but may miss matches
+#  - "lossless": exact for a given threshold t, keeps every pair that
+#    filter_similarity would keep
+#  - "email": only pairs with identical emails or email prefixes, found
+#    with a hash join in O(n + pairs)
+#  - "minhash": approximate, pairs whose names or email prefixes have
+#    similar q-gram sets (MinHash signatures with LSH banding)
+BLOCKING_MODES = ("keys", "lossless", "email", "minhash")
+
+# Default LSH banding of "minhash" mode: more bands find more pairs,
+# more rows per band make buckets more selective
+MINHASH_BANDS = 32
+MINHASH_ROWS = 3
+# LSH buckets larger than this are skipped (very common q-gram sets)
+MINHASH_MAX_BUCKET = 100
+
+# Blocks larger than this are skipped in "keys" mode (too generic to be useful)
+MAX_BLOCK_SIZE = 1000
+
+# Slack for float rounding in Levenshtein ratio bounds
+RATIO_EPS = 1e-9
+
+# "lossless" mode falls back to scoring all pairs if more than this share
+# of the first LOSSLESS_CHECK_PAIRS pairs (or more) are candidates
+LOSSLESS_MAX_FRACTION = 0.5
+LOSSLESS_CHECK_PAIRS = 100_000
+
+def blocking_keys(processed):
+    """Heuristic blocking keys of one pre-processed developer."""
+    name, first, _, i_first, _, email, prefix = processed
+    keys = {"email:" + email}
+    # Normalized name tokens
+    keys.update("tok:" + token for token in name.split() if len(token) > 1)
+    # Email prefix q-grams (q=3), short prefixes as a whole
+    prefix = prefix.casefold()
+    if len(prefix) < 3:
+        keys.add("pq:" + prefix)
+    else:
+        keys.update("pq:" + prefix[k:k + 3] for k in range(len(prefix) - 2))
+    # First-name initial combined with a name length bucket
+    if i_first:
+        keys.add(f"fi:{i_first}:{len(name) // 4}")
+    # First name as a whole, matches e.g. initials-style prefixes
+    if first:
+        keys.add("first:" + first)
+    return keys
+
+def _key_candidates(features, max_block_size=MAX_BLOCK_SIZE):
+    """Pairs sharing at least one blocking key."""
+    blocks = {}
+    for i in range(len(features)):
+        for key in blocking_keys(features.processed(i)):
+            blocks.setdefault(key, []).append(i)
+
+    pairs = set()
+    for key, members in blocks.items():
+        # Identical emails are always duplicates, never skip those blocks
+        if len(members) > max_block_size and not key.startswith("email:"):
+            continue
+        pairs.update(combinations(members, 2))
+    return pairs
+
+def _grams(value):
+    """Characters and bigrams of value."""
+    return set(value) | {value[k:k + 2] for k in range(len(value) - 1)}
+
+def _token_ranks(value, order):
+    """Ranks of the multiset tokens of value (the k-th occurrence of a
+    character is its own token). Tokens missing from order rank first."""
+    seen = {}
+    ranks = []
+    for c in value:
+        seen[c] = seen.get(c, 0) + 1
+        ranks.append(order.get((c, seen[c]), -1))
+    return sorted(ranks)
+
+class _RatioIndex:
+    """Prefix-filtering postings of one field.
+
+    Levenshtein ratio is 2 * LCS / (len_a + len_b), and LCS is bounded by the
+    character multiset overlap. Every developer indexes the prefix of its
+    rarest tokens that any value reaching ratio t must share (AllPairs prefix
+    filtering), so probing with the prefix of a query value finds a superset
+    of the developers whose ratio can reach t. Empty values only match empty
+    values (ratio 1.0), unless match_empty is False.
+    """
+
+    def __init__(self, values, t, match_empty=True):
+        self.values = values
+        self.min_ratio = t / (2 - t)
+        self.empties = [i for i, value in enumerate(values) if value == ""] if match_empty else []
+        freq = {}
+        for value in values:
+            seen = {}
+            for c in value:
+                seen[c] = seen.get(c, 0) + 1
+                freq[(c, seen[c])] = freq.get((c, seen[c]), 0) + 1
+        self.order = {token: rank for rank, token in enumerate(
+            sorted(freq, key=lambda token: (freq[token], token)))}
+        self.postings = {}
+        for i, value in enumerate(values):
+            if value:
+                for rank in _token_ranks(value, self.order)[:self._prefix_length(len(value))]:
+                    self.postings.setdefault(rank, []).append(i)
+
+    def _prefix_length(self, length):
+        return length - max(1, math.ceil(self.min_ratio * length - RATIO_EPS)) + 1
+
+    def candidates(self, value, after=-1):
+        """Indices larger than after of the values whose ratio with value may reach t."""
+        if value == "":
+            return self.empties[bisect.bisect_right(self.empties, after):]
+        length = len(value)
+        min_len = self.min_ratio * length - RATIO_EPS
+        max_len = length / self.min_ratio + RATIO_EPS if self.min_ratio > 0 else math.inf
+        values = self.values
+        found = set()
+        for rank in _token_ranks(value, self.order)[:self._prefix_length(length)]:
+            posting = self.postings.get(rank, ())
+            for j in posting[bisect.bisect_right(posting, after):]:
+                if min_len <= len(values[j]) <= max_len:
+                    found.add(j)
+        return found
+
+class PairList:
+    """Index pairs in two int32 arrays, 8 bytes per pair. Supports len(),
+    iteration, indexing and slicing like a list of (i, j) tuples."""
+    __slots__ = ("firsts", "seconds")
+
+    def __init__(self, firsts, seconds):
+        self.firsts = firsts
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.firsts)
+
+    def __iter__(self):
+        return zip(self.firsts, self.seconds)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return PairList(self.firsts[key], self.seconds[key])
+        return self.firsts[key], self.seconds[key]
+
+    def __eq__(self, other):
+        if not isinstance(other, (PairList, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def index_arrays(self):
+        """Pairs as NumPy index arrays (i, j)."""
+        return (np.frombuffer(self.firsts, dtype=np.int32),
+                np.frombuffer(self.seconds, dtype=np.int32))
+
+def _lossless_candidates(features, t):
+    """Pairs that can pass filter_similarity at threshold t, as a PairList
+    in combinations() order, or None if more than LOSSLESS_MAX_FRACTION of
+    the pairs are kept.
+
+    A pair is kept if the emails are identical or if at least two of the
+    conditions c1, c2, c3, c4-c7 can be true. Each developer is probed
+    against an IdentityIndex of all developers, so only the candidates of
+    one developer are held at a time, besides the index and the result.
+    """
+    index = IdentityIndex(features, t)
+    n = len(features)
+    firsts, seconds = array("i"), array("i")
+    seen = 0
+    for i in range(n):
+        found = index.candidates(features, i, after=i)
+        firsts.extend([i] * len(found))
+        seconds.extend(found)
+        # Once enough pairs are seen, give up if blocking prunes too little
+        seen += n - 1 - i
+        if seen >= LOSSLESS_CHECK_PAIRS and len(seconds) > LOSSLESS_MAX_FRACTION * seen:
+            logging.info("Lossless blocking keeps %d of the first %d pairs, "
+                         "scoring all pairs instead", len(seconds), seen)
+            return None
+    return PairList(firsts, seconds)
+
+class MinHashLSH:
+    """Approximate candidate pairs with MinHash signatures and LSH banding.
+
+    Each developer's processed full name and email prefix are turned into
+    sets of character q-grams, hashed with crc32 so results are the same in
+    every run. Every field gets a signature of bands * rows MinHash values,
+    and developers whose signatures agree on all rows of a band of either
+    field become candidates. A pair with q-gram Jaccard similarity s is found
+    with probability 1 - (1 - s**rows)**bands. Buckets larger than
+    max_bucket_size are skipped, like large blocks in "keys" mode.
+    """
+    FIELDS = ("names", "prefixes")
+
+    def __init__(self, bands=MINHASH_BANDS, rows=MINHASH_ROWS, q=2, seed=0,
+                 max_bucket_size=MINHASH_MAX_BUCKET):
+        if bands < 1 or rows < 1:
+            raise ValueError("MinHash bands and rows must be positive")
+        self.bands = bands
+        self.rows = rows
+        self.q = q
+        self.max_bucket_size = max_bucket_size
+        rng = np.random.default_rng(seed)
+        n_hashes = bands * rows
+        # Multiply-shift hashing of the 32-bit q-gram hashes, odd multipliers
+        self._mul = rng.integers(1, 2**63, n_hashes, dtype=np.uint64) | np.uint64(1)
+        self._add = rng.integers(0, 2**63, n_hashes, dtype=np.uint64)
+        self._band_mul = rng.integers(1, 2**63, rows, dtype=np.uint64) | np.uint64(1)
+
+    def __repr__(self):
+        return f"minhash(bands={self.bands}, rows={self.rows})"
+
+    def shingles(self, value):
+        """crc32 hashes of the q-grams of value, padded with ^ and $.
+        Empty for an empty value."""
+        if value == "":
+            return set()
+        padded = f"^{value}$"
+        return {zlib.crc32(padded[k:k + self.q].encode("utf-8"))
+                for k in range(max(1, len(padded) - self.q + 1))}
+
+    def signatures(self, values, batch_size=4096):
+        """MinHash signatures of values as a (len(values), bands * rows)
+        uint32 array, and a mask of values that have any q-grams."""
+        n_hashes = len(self._mul)
+        signatures = np.zeros((len(values), n_hashes), dtype=np.uint32)
+        shingles = [self.shingles(value) for value in values]
+        present = np.array([bool(grams) for grams in shingles], dtype=bool)
+        for start in range(0, len(values), batch_size):
+            batch = [sorted(grams) for grams in shingles[start:start + batch_size] if grams]
+            if not batch:
+                continue
+            grams = np.fromiter((gram for row in batch for gram in row), dtype=np.uint64)
+            starts = np.cumsum([0] + [len(row) for row in batch[:-1]])
+            # High 32 bits of (a * x + b) mod 2**64
+            hashed = (grams[:, None] * self._mul + self._add) >> np.uint64(32)
+            rows = np.flatnonzero(present[start:start + batch_size]) + start
+            signatures[rows] = np.minimum.reduceat(hashed, starts, axis=0)
+        return signatures, present
+
+    def candidate_pairs(self, features):
+        """Set of index pairs (i, j), i < j, sharing an LSH bucket."""
+        ids, signatures = [], []
+        for field in self.FIELDS:
+            field_signatures, present = self.signatures(getattr(features, field))
+            ids.append(np.flatnonzero(present))
+            signatures.append(field_signatures[present])
+        # Names and email prefixes share the buckets, so that a name can also
+        # match an email prefix (like the substring conditions c4-c7)
+        ids = np.concatenate(ids)
+        signatures = np.concatenate(signatures).astype(np.uint64)
+
+        pairs = set()
+        for band in range(self.bands):
+            rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            keys = (rows * self._band_mul).sum(axis=1)
+            order = np.argsort(keys, kind="stable")
+            members = ids[order].tolist()
+            starts = np.flatnonzero(np.r_[True, np.diff(keys[order]) != 0])
+            sizes = np.diff(np.r_[starts, len(keys)])
+            # Only buckets with more than one member, singletons are the majority
+            for start, size in zip(starts.tolist(), sizes.tolist()):
+                if 1 < size <= self.max_bucket_size:
+                    pairs.update(combinations(sorted(set(members[start:start + size])), 2))
+        return pairs
+
+def candidate_recall(devs, pairs, t=0.7):
+    """Share of the pairs filter_similarity keeps at t (the exact result of
+    scoring all pairs) that are among the candidate pairs.
+    Returns the recall and the number of exact pairs."""
+    features = preprocess_developers(devs)
+    lossless = candidate_pairs(features, "lossless", t)
+    if lossless is None:
+        lossless = combinations(range(len(features)), 2)
+    exact = [(i, j) for i, j in lossless
+             if score_pair_filtered(features, i, j, t) is not None]
+    if not exact:
+        return 1.0, 0
+    pairs = set(pairs)
+    return sum(pair in pairs for pair in exact) / len(exact), len(exact)
+
+def email_groups(devs, by_prefix=False):
+    """Group developer indices by email with a hash map, in O(n).
+
+    With by_prefix, developers are grouped by email prefix instead.
+    Emails are compared exactly, like in filter_similarity.
+    Returns the groups with at least two members, indices in ascending order.
+    """
+    features = preprocess_developers(devs)
+    keys = features.prefixes if by_prefix else features.emails
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+def same_email_pairs(devs):
+    """All index pairs (i, j), i < j, with identical emails, sorted.
+
+    Identical emails alone make a pair a duplicate in filter_similarity,
+    so these pairs are found without any scoring, in O(n + pairs).
+    """
+    pairs = []
+    for members in email_groups(devs):
+        pairs.extend(combinations(members, 2))
+    pairs.sort()
+    return pairs
+
+def email_identity_ids(devs):
+    """Identity id of each developer after uniting developers with the same
+    email: the smallest index in its group."""
+    ids = list(range(len(preprocess_developers(devs))))
+    for members in email_groups(devs):
+        for i in members:
+            ids[i] = members[0]
+    return ids
+
+def candidate_pairs(devs, mode="lossless", t=0.7):
+    """Return sorted index pairs (i, j), i < j, of developers worth scoring,
+    or None if every pair has to be scored.
+
+    In "lossless" mode the pairs are guaranteed to contain every pair that
+    filter_similarity keeps at threshold t. In "keys" mode pairs sharing
+    a heuristic blocking key are returned. In "email" mode only pairs with
+    identical emails (always duplicates) or identical email prefixes
+    (c2 is 1.0) are returned. In "minhash" mode (or with a MinHashLSH
+    instance as mode) pairs with similar names or email prefixes are found
+    approximately, plus all pairs with identical emails.
+    """
+    if mode == "minhash":
+        mode = MinHashLSH()
+    if not isinstance(mode, MinHashLSH) and mode not in BLOCKING_MODES:
+        raise ValueError(f"Unknown blocking mode: {mode}")
+    features = preprocess_developers(devs)
+    if isinstance(mode, MinHashLSH):
+        pairs = mode.candidate_pairs(features)
+        pairs.update(same_email_pairs(features))
+    elif mode == "keys":
+        pairs = _key_candidates(features)
+    elif mode == "email":
+        pairs = set(same_email_pairs(features))
+        logging.info("Email hash join: %d same-email pairs", len(pairs))
+        for members in email_groups(features, by_prefix=True):
+            pairs.update(combinations(members, 2))
+    elif t <= 0:
+        # Every pair passes c1 and c2, nothing can be pruned
+        return None
+    else:
+        return _lossless_candidates(features, t)
+    return sorted(pairs)
+
+def compute_similarity(devs, blocking=None, t=0.7, workers=1, filtered_only=False):
+    """Compute similarity between all possible pairs,
+    or only candidate pairs if a blocking mode is given.
+    With workers > 1 pairs are scored in a process pool.
+    With filtered_only, only pairs passing filter_similarity at t are returned."""
+    return list(iter_similarity(devs, blocking, t, workers, filtered_only))
+
+def iter_similarity(devs, blocking=None, t=0.7, workers=1, filtered_only=False, shard=None):
+    """Generator version of compute_similarity, yields one row per pair
+    in combinations() order without building the full list.
+    With shard (i, N), only the i-th of N slices of the pairs is scored."""
     logging.info("Computing similarity for developers")
-    similarity = []
-    for dev_a, dev_b in combinations(devs, 2):
-        similarity.append(compute_pair_similarity(dev_a, dev_b))
-    return similarity
+    features = preprocess_developers(devs)
+    pairs = select_pairs(features, blocking, t, shard)
+    yield from score_pairs(features, pairs, workers, t if filtered_only else None)
+
+def select_pairs(features, blocking=None, t=0.7, shard=None):
+    """Pairs to score: the candidate pairs of the blocking mode, or None
+    for all pairs. With shard (i, N), 1 <= i <= N, only the i-th of N
+    contiguous slices with an equal number of pairs is returned, all pairs
+    as a PairRange."""
+    n = len(features)
+    total = n * (n - 1) // 2
+    pairs = None if blocking is None else candidate_pairs(features, blocking, t)
+    if pairs is not None:
+        logging.info("Blocking (%s) kept %d of %d pairs, %d pruned",
+                     blocking, len(pairs), total, total - len(pairs))
+    if shard is not None:
+        index, count = shard
+        size = total if pairs is None else len(pairs)
+        start, end = shard_bounds(size, index, count)
+        pairs = PairRange(n, start, end) if pairs is None else pairs[start:end]
+        logging.info("Shard %d/%d: pairs %d to %d of %d", index, count, start, end, size)
+    return pairs
+
+def shard_bounds(total, index, count):
+    """Pair index range [start, end) of shard index (1-based) of count."""
+    return total * (index - 1) // count, total * index // count
+
+def score_pairs(features, pairs=None, workers=1, t=None):
+    """Yield score_pair rows for a list of index pairs (all pairs if None),
+    serially or in a process pool. If t is given, only pairs passing
+    filter_similarity at t are yielded."""
+    if workers > 1:
+        for results in _iter_results_parallel(features, feature_arrays(features), pairs,
+                                              workers, t):
+            yield from results.rows()
+        return
+    if pairs is None:
+        pairs = combinations(range(len(features)), 2)
+    yield from _iter_scores(features, pairs, t)
+
+def _iter_scores(features, pairs, t=None):
+    """Score index pairs. If t is given, only pairs passing the threshold are kept."""
+    if t is None:
+        for i, j in pairs:
+            yield score_pair(features, i, j)
+        return
+    # Pairs come in combinations() order, score them row by row
+    for i, row in groupby(pairs, key=itemgetter(0)):
+        yield from score_row_filtered(features, i, (j for _, j in row), t)
+
+def pair_offset(n, i):
+    """Number of pairs before row i in combinations(range(n), 2) order."""
+    return i * (2 * n - i - 1) // 2
+
+def pair_from_index(n, k):
+    """Return the k-th pair (i, j) of combinations(range(n), 2)."""
+    # Binary search for the row containing pair k
+    low, high = 0, n - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if pair_offset(n, mid) <= k:
+            low = mid
+        else:
+            high = mid - 1
+    return low, low + 1 + k - pair_offset(n, low)
+
+def iter_pair_range(n, start, end):
+    """Yield pairs with index start <= k < end in combinations(range(n), 2) order."""
+    if start >= end:
+        return
+    i, j = pair_from_index(n, start)
+    remaining = end - start
+    while remaining > 0:
+        row_end = min(n, j + remaining)
+        for jj in range(j, row_end):
+            yield i, jj
+        remaining -= row_end - j
+        i, j = i + 1, i + 2
+
+class PairRange:
+    """Pairs with index start <= k < end in combinations(range(n), 2) order,
+    as a lazy sequence. Supports len(), iteration and slicing like the
+    candidate pair lists, without building the pairs."""
+    __slots__ = ("n", "start", "end")
+
+    def __init__(self, n, start, end):
+        self.n = n
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        return iter_pair_range(self.n, self.start, self.end)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("PairRange only supports contiguous slices")
+        start, end, _ = key.indices(len(self))
+        return PairRange(self.n, self.start + start, self.start + max(start, end))
+
+# Feature table of a pool worker, set once per process by _init_worker
+_WORKER_FEATURES = None
+
+def _init_worker(features):
+    """Process pool initializer, receives the feature table once."""
+    global _WORKER_FEATURES
+    _WORKER_FEATURES = features
+
+def _score_pair_range(n, start, end, t=None):
+    """Pool task: score all pairs with index in [start, end) into the
+    arrays of PairResults."""
+    return _score_arrays(_WORKER_FEATURES, iter_pair_range(n, start, end), t)
+
+def _score_pair_list(pairs, t=None):
+    """Pool task: score the given candidate pairs into the arrays of PairResults."""
+    return _score_arrays(_WORKER_FEATURES, pairs, t)
+
+# Number of pairs held in memory at a time when streaming
+CHUNK_SIZE = 100_000
+
+# Upper limit of pairs per pool task, keeps memory of pending results bounded
+MAX_TASK_PAIRS = 200_000
+
+def _iter_results_parallel(features, arrays, pairs, workers, t=None, chunk_size=MAX_TASK_PAIRS):
+    """Score pairs in a process pool over contiguous pair-index ranges of
+    up to chunk_size pairs. Yields one PairResults per task, in the same
+    order as the serial computation."""
+    n = len(features)
+    total = n * (n - 1) // 2 if pairs is None else len(pairs)
+    # A few tasks per worker to balance uneven ranges
+    chunk = max(1, min(MAX_TASK_PAIRS, chunk_size, math.ceil(total / (workers * 4))))
+    starts = range(0, total, chunk)
+    logging.info("Scoring %d pairs with %d workers in %d tasks",
+                 total, workers, len(starts))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(features,)) as executor:
+        # Only a bounded number of tasks is in flight at a time
+        pending = deque()
+        for start in starts:
+            if pairs is None:
+                pending.append(executor.submit(_score_pair_range, n, start,
+                                               min(start + chunk, total), t))
+            else:
+                pending.append(executor.submit(_score_pair_list,
+                                               pairs[start:start + chunk], t))
+            if len(pending) >= workers * 2:
+                yield PairResults(arrays, *pending.popleft().result())
+        while pending:
+            yield PairResults(arrays, *pending.popleft().result())
 
 def compute_pair_similarity(dev_a, dev_b):
     """Helper function for compute similarity for a single pair (dev_a, dev_b)"""
-    # Pre-process both developers
-    name_a, first_a, last_a, i_first_a, i_last_a, email_a, prefix_a = process(dev_a)
-    name_b, first_b, last_b, i_first_b, i_last_b, email_b, prefix_b = process(dev_b)
+    return score_pair(DeveloperFeatures([dev_a, dev_b]), 0, 1)
+
+def score_pair(features, a, b):
+    """Similarity of developers a and b, given as indices into a DeveloperFeatures table"""
+    # Save similarity data for each conditions. Original names are saved
+    return [features.raw_names[a], features.emails[a],
+            features.raw_names[b], features.emails[b],
+            *pair_conditions(features, a, b)]
+
+def pair_conditions(features, a, b):
+    """Conditions c1, c2, c3.1, c3.2, c4, c5, c6, c7 of developers a and b."""
+    first_a, first_b = features.firsts[a], features.firsts[b]
+    last_a, last_b = features.lasts[a], features.lasts[b]
+    prefix_a, prefix_b = features.prefixes[a], features.prefixes[b]
+    i_first_a, i_first_b = features.i_firsts[a], features.i_firsts[b]
+    i_last_a, i_last_b = features.i_lasts[a], features.i_lasts[b]
 
     # Conditions of Bird heuristic
-    c1 = sim(name_a, name_b)
+    c1 = sim(features.names[a], features.names[b])
     c2 = sim(prefix_b, prefix_a)
     c31 = sim(first_a, first_b)
     #If either last name is empty, no similarity is calculated for it. Modified from Bird.
@@ -145,14 +1357,450 @@ def compute_pair_similarity(dev_a, dev_b):
         c6 = i_first_b in prefix_a and last_b in prefix_a
     if i_last_b != "":
         c7 = i_last_b in prefix_a and first_b in prefix_a
+    return c1, c2, c31, c32, c4, c5, c6, c7
 
-    # Save similarity data for each conditions. Original names are saved
-    return [dev_a[0], email_a, dev_b[0], email_b, c1, c2, c31, c32, c4, c5, c6, c7]
+def _length_window(length, t):
+    """Lengths (low, high) of values whose ratio with a value of the given
+    length can reach t. The ratio is at most 2 * min(len) / (len_a + len_b)."""
+    if t <= RATIO_EPS:
+        return 0, math.inf
+    if t > 1:
+        return math.inf, -1
+    return ((t - RATIO_EPS) * length / (2 - t + RATIO_EPS),
+            length * (2 - t + RATIO_EPS) / (t - RATIO_EPS))
+
+def score_pair_filtered(features, a, b, t):
+    """Threshold-aware version of score_pair.
+
+    Returns the same row as score_pair if the pair passes filter_similarity
+    at threshold t, otherwise None.
+    """
+    return next(score_row_filtered(features, a, (b,), t), None)
+
+def score_row_filtered(features, a, bs, t):
+    """Yield score_pair rows of developer a against each b in bs that pass
+    filter_similarity at threshold t."""
+    raw_names, emails = features.raw_names, features.emails
+    for b, *conditions in row_conditions_filtered(features, a, bs, t):
+        yield [raw_names[a], emails[a], raw_names[b], emails[b], *conditions]
+
+def row_conditions_filtered(features, a, bs, t):
+    """Yield (b, c1, c2, c3.1, c3.2, c4, c5, c6, c7) of developer a against
+    each b in bs that passes filter_similarity at threshold t.
+
+    The substring conditions c4-c7 are checked first, then the length bounds
+    of the ratios, and only then the ratios c2, c1 and c3, stopping as soon
+    as two conditions are reached or can no longer be reached. Ratios already
+    computed are reused in the conditions of a passing pair.
+    """
+    names, firsts, lasts = features.names, features.firsts, features.lasts
+    i_firsts, i_lasts = features.i_firsts, features.i_lasts
+    emails, prefixes = features.emails, features.prefixes
+    name_a, first_a, last_a = names[a], firsts[a], lasts[a]
+    email_a, prefix_a = emails[a], prefixes[a]
+    # Initials of a if its c4 / c5 condition can apply at all
+    c4_a = i_firsts[a] if i_firsts[a] != "" and last_a != "" else None
+    c5_a = i_lasts[a] if i_lasts[a] != "" else None
+    name_low, name_high = _length_window(len(name_a), t)
+    prefix_low, prefix_high = _length_window(len(prefix_a), t)
+    first_low, first_high = _length_window(len(first_a), t)
+    # c3.2 is 0.0 if a last name is empty
+    last_low, last_high = (_length_window(len(last_a), t) if last_a != ""
+                           else (math.inf, -1))
+
+    for b in bs:
+        # Identical emails are always duplicates
+        if emails[b] == email_a:
+            yield (b, *pair_conditions(features, a, b))
+            continue
+
+        prefix_b, first_b, last_b = prefixes[b], firsts[b], lasts[b]
+        c4 = c4_a is not None and c4_a in prefix_b and last_a in prefix_b
+        c5 = c5_a is not None and c5_a in prefix_b and first_a in prefix_b
+        i_first_b, i_last_b = i_firsts[b], i_lasts[b]
+        c6 = i_first_b != "" and last_b != "" and i_first_b in prefix_a and last_b in prefix_a
+        c7 = i_last_b != "" and i_last_b in prefix_a and first_b in prefix_a
+        n_true = c4 + c5 + c6 + c7
+
+        c1 = c2 = c31 = c32 = None
+        if n_true < 2:
+            may_c1 = name_low <= len(names[b]) <= name_high
+            may_c2 = prefix_low <= len(prefix_b) <= prefix_high
+            may_c3 = (last_low <= len(last_b) <= last_high
+                      and first_low <= len(first_b) <= first_high)
+            # Conditions reached or not yet ruled out
+            possible = n_true + may_c1 + may_c2 + may_c3
+            if possible < 2:
+                continue
+            if may_c2:
+                c2 = sim(prefix_b, prefix_a)
+                if c2 >= t:
+                    n_true += 1
+                else:
+                    possible -= 1
+                    if possible < 2:
+                        continue
+            if n_true < 2 and may_c1:
+                c1 = sim(name_a, names[b])
+                if c1 >= t:
+                    n_true += 1
+                else:
+                    possible -= 1
+                    if possible < 2:
+                        continue
+            if n_true < 2:
+                # Only c3 is left and can still be reached
+                c31 = sim(first_a, first_b)
+                if c31 < t:
+                    continue
+                c32 = sim(last_a, last_b)
+                if c32 < t:
+                    continue
+
+        # Complete the conditions with the ratios not computed yet
+        if c1 is None:
+            c1 = sim(name_a, names[b])
+        if c2 is None:
+            c2 = sim(prefix_b, prefix_a)
+        if c31 is None:
+            c31 = sim(first_a, first_b)
+        if c32 is None:
+            c32 = 0.0 if last_a == "" or last_b == "" else sim(last_a, last_b)
+        yield b, c1, c2, c31, c32, c4, c5, c6, c7
+
+# Similarity engines: "python" scores pair by pair,
+# "vectorized" scores blocks of pairs as NumPy columns
+ENGINES = ("python", "vectorized")
+
+# Number of set bits of each c4-c7 bitmask
+_FLAG_COUNTS = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.uint8)
+
+class PairResults:
+    """Similarity results of index pairs held in NumPy arrays.
+
+    A pair takes two int32 developer indices, the c1, c2, c3.1 and c3.2
+    scores (float64, so threshold checks and output values are the same as
+    for score_pair rows) and c4-c7 as bits of one byte, instead of a list
+    of 12 Python objects. arrays is the feature_arrays of the developers,
+    names and emails are only joined back in to_dataframe().
+    """
+    __slots__ = ("arrays", "i", "j", "scores", "flags")
+    SCORE_COLUMNS = ("c1", "c2", "c3.1", "c3.2")
+    FLAG_COLUMNS = ("c4", "c5", "c6", "c7")
+
+    def __init__(self, arrays, i, j, scores, flags):
+        self.arrays = arrays
+        self.i = i
+        self.j = j
+        self.scores = scores
+        self.flags = flags
+
+    def __len__(self):
+        return len(self.i)
+
+    def max_thresholds(self):
+        """Highest threshold at which filter_similarity keeps each pair,
+        see max_thresholds."""
+        email_ids = self.arrays["email_ids"]
+        return max_thresholds(self.scores[:, 0], self.scores[:, 1],
+                              np.minimum(self.scores[:, 2], self.scores[:, 3]),
+                              _FLAG_COUNTS[self.flags],
+                              email_ids[self.i] == email_ids[self.j])
+
+    def duplicates(self, t):
+        """Boolean mask of the pairs filter_similarity keeps at threshold t."""
+        scores = self.scores
+        n_true = ((scores[:, 0] >= t).astype(np.uint8) + (scores[:, 1] >= t)
+                  + ((scores[:, 2] >= t) & (scores[:, 3] >= t)) + _FLAG_COUNTS[self.flags])
+        email_ids = self.arrays["email_ids"]
+        return (email_ids[self.i] == email_ids[self.j]) | (n_true >= 2)
+
+    def filter(self, t):
+        """The pairs filter_similarity keeps at threshold t, as PairResults."""
+        keep = self.duplicates(t)
+        return PairResults(self.arrays, self.i[keep], self.j[keep], self.scores[keep],
+                           self.flags[keep])
+
+    def to_dataframe(self):
+        """DataFrame with the columns of create_similarity_dataframe."""
+        raw_names, emails = self.arrays["raw_names"], self.arrays["emails"]
+        columns = {"name_1": raw_names[self.i], "email_1": emails[self.i],
+                   "name_2": raw_names[self.j], "email_2": emails[self.j]}
+        for k, column in enumerate(self.SCORE_COLUMNS):
+            columns[column] = self.scores[:, k]
+        for bit, column in enumerate(self.FLAG_COLUMNS):
+            columns[column] = (self.flags >> bit & 1).astype(bool)
+        return pd.DataFrame(columns)
+
+    def rows(self):
+        """Yield the score_pair row of each pair."""
+        raw_names, emails = self.arrays["raw_names"], self.arrays["emails"]
+        for a, b, scores, flags in zip(self.i.tolist(), self.j.tolist(),
+                                       self.scores.tolist(), self.flags.tolist()):
+            yield [raw_names[a], emails[a], raw_names[b], emails[b], *scores,
+                   *(bool(flags >> bit & 1) for bit in range(4))]
+
+def max_thresholds(c1, c2, c3, n_flags, same_email):
+    """Highest threshold at which filter_similarity keeps each pair.
+
+    A pair is kept at t if the emails are identical or two conditions hold.
+    c4-c7 hold at any t, c1, c2 and c3 (the smaller of c3.1 and c3.2) hold
+    up to their value, so the pair is kept up to the second largest of
+    these thresholds. A pair is kept at t if and only if the result is >= t,
+    so one scoring pass serves any number of thresholds.
+    """
+    ratios = np.sort(np.column_stack((c1, c2, c3)), axis=1)
+    result = np.where(n_flags >= 2, np.inf, np.where(n_flags == 1, ratios[:, 2], ratios[:, 1]))
+    result[np.asarray(same_email, dtype=bool)] = np.inf
+    return result
+
+def score_pair_results(features, pairs, arrays=None, t=None):
+    """Score index pairs like score_pair into PairResults. If t is given,
+    only pairs passing filter_similarity at t are kept."""
+    if arrays is None:
+        arrays = feature_arrays(features)
+    return PairResults(arrays, *_score_arrays(features, pairs, t))
+
+def _score_arrays(features, pairs, t=None):
+    """Arrays (i, j, scores, flags) of PairResults for index pairs.
+    Results are appended to array buffers, no row lists are built."""
+    if t is None:
+        conditions = ((a, b, *pair_conditions(features, a, b)) for a, b in pairs)
+    else:
+        # Pairs come in combinations() order, score them row by row
+        conditions = ((a, *row) for a, bs in groupby(pairs, key=itemgetter(0))
+                      for row in row_conditions_filtered(features, a, (b for _, b in bs), t))
+    i, j, scores, flags = array("i"), array("i"), array("d"), array("B")
+    for a, b, c1, c2, c31, c32, c4, c5, c6, c7 in conditions:
+        i.append(a)
+        j.append(b)
+        scores.extend((c1, c2, c31, c32))
+        flags.append(c4 | c5 << 1 | c6 << 2 | c7 << 3)
+    return (np.frombuffer(i, dtype=np.int32), np.frombuffer(j, dtype=np.int32),
+            np.frombuffer(scores, dtype=np.float64).reshape(-1, 4),
+            np.frombuffer(flags, dtype=np.uint8))
+
+def iter_pair_results(devs, blocking=None, t=0.7, chunk_size=CHUNK_SIZE, shard=None,
+                      workers=1, filtered_only=False):
+    """Yield PairResults of up to chunk_size pairs in combinations() order,
+    with the same values as iter_similarity. With workers > 1 pairs are
+    scored in a process pool. With filtered_only, only pairs passing
+    filter_similarity at t are kept and empty chunks are skipped."""
+    logging.info("Computing similarity for developers")
+    features = preprocess_developers(devs)
+    pairs = select_pairs(features, blocking, t, shard)
+    yield from score_pair_chunks(features, pairs, feature_arrays(features), chunk_size,
+                                 workers, t if filtered_only else None)
+
+def score_pair_chunks(features, pairs=None, arrays=None, chunk_size=CHUNK_SIZE, workers=1,
+                      t=None):
+    """PairResults version of score_pairs: yield PairResults of up to
+    chunk_size of the index pairs (all pairs if None), serially or in a
+    process pool. If t is given, only pairs passing filter_similarity at t
+    are kept and empty chunks are skipped."""
+    if arrays is None:
+        arrays = feature_arrays(features)
+    if workers > 1:
+        for results in _PROFILER.timed(_iter_results_parallel(
+                features, arrays, pairs, workers, t, chunk_size), "scoring"):
+            if len(results) or t is None:
+                yield results
+        return
+    pairs = combinations(range(len(features)), 2) if pairs is None else iter(pairs)
+    while True:
+        with _PROFILER.stage("scoring"):
+            chunk = list(islice(pairs, chunk_size))
+            if not chunk:
+                return
+            results = score_pair_results(features, chunk, arrays, t)
+        if len(results) or t is None:
+            yield results
+
+# Distinct-value memoization of the vectorized ratios. A field is memoized
+# if it has at most MEMO_MAX_DISTINCT distinct values (its ratio matrix
+# takes 8 bytes per pair of values) and at most MEMO_MAX_DISTINCT_RATIO of
+# its values are distinct; otherwise most value pairs are distinct and
+# finding them costs more than the ratios saved
+MEMO_MAX_DISTINCT = 2048
+MEMO_MAX_DISTINCT_RATIO = 0.5
+
+class DistinctRatios:
+    """Ratios of the distinct values of a field, each computed once.
+
+    Values are interned into integer ids, and the ratio of each pair of
+    ids is kept in a matrix filled on demand (NaN until computed). Pairs
+    of developers that repeat a pair of values, such as common first names
+    or shared last names, then cost a lookup instead of a Levenshtein call.
+    """
+
+    def __init__(self, values):
+        self.values, ids = np.unique(values, return_inverse=True)
+        self.ids = ids.astype(np.int32)
+        self.matrix = None
+        self.lookups = 0
+        self.computed = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def ratios(self, i, j, workers=1):
+        """Ratios of the values of developers i and j (index arrays)."""
+        d = len(self.values)
+        if self.matrix is None:
+            self.matrix = np.full((d, d), np.nan)
+        a, b = self.ids[i], self.ids[j]
+        result = self.matrix[a, b]
+        missing = np.flatnonzero(np.isnan(result))
+        if len(missing):
+            # The ratio is symmetric, so (a, b) and (b, a) share a key
+            low = np.minimum(a[missing], b[missing]).astype(np.int64)
+            high = np.maximum(a[missing], b[missing])
+            keys, inverse = np.unique(low * d + high, return_inverse=True)
+            value_a, value_b = keys // d, keys % d
+            computed = cpdist(self.values[value_a], self.values[value_b],
+                              scorer=Indel.normalized_similarity, dtype=np.float64,
+                              workers=workers)
+            self.matrix[value_a, value_b] = computed
+            self.matrix[value_b, value_a] = computed
+            result[missing] = computed[inverse]
+            self.computed += len(keys)
+        self.lookups += len(result)
+        return result
+
+    def hit_rate(self):
+        """Share of lookups answered without computing a ratio."""
+        return 1 - self.computed / self.lookups if self.lookups else None
+
+def distinct_ratios(arrays, field):
+    """DistinctRatios of a field of feature_arrays, created on first use,
+    or None if the field has too many distinct values to be memoized."""
+    memo = arrays.setdefault("memo", {})
+    if field not in memo:
+        values = arrays[field]
+        distinct = len(set(values.tolist()))
+        memo[field] = DistinctRatios(values) if (
+            distinct <= MEMO_MAX_DISTINCT
+            and distinct <= MEMO_MAX_DISTINCT_RATIO * len(values)) else None
+    return memo[field]
+
+def log_ratio_memo(arrays):
+    """Log the hit rate of each memoized field and count the ratio lookups."""
+    for field, memo in arrays.get("memo", {}).items():
+        if memo is not None and memo.lookups:
+            logging.info("Ratio memo (%s): %d distinct values, %d of %d ratios computed, "
+                         "hit rate %.1f%%", field, len(memo), memo.computed, memo.lookups,
+                         100 * memo.hit_rate())
+            _PROFILER.count("memo_lookups", memo.lookups)
+            _PROFILER.count("memo_hits", memo.lookups - memo.computed)
+
+def feature_arrays(features):
+    """NumPy arrays of a DeveloperFeatures table for the vectorized engine.
+    Object arrays feed rapidfuzz, unicode arrays the substring checks."""
+    arrays = {"raw_names": np.array(features.raw_names, dtype=object),
+              "emails": np.array(features.emails, dtype=object)}
+    for field in ("names", "firsts", "lasts", "prefixes"):
+        arrays[field] = np.array(getattr(features, field), dtype=object)
+    for field in ("lasts", "firsts", "prefixes", "i_firsts", "i_lasts"):
+        arrays["u_" + field] = np.array(getattr(features, field), dtype=str)
+    # Equal ids for identical emails, compared instead of the strings
+    arrays["email_ids"] = np.array(email_identity_ids(features), dtype=np.int32)
+    return arrays
+
+def pair_index_arrays(n, start, end):
+    """Index arrays (i, j) of pairs start <= k < end in combinations(range(n), 2) order."""
+    rows = np.arange(n, dtype=np.int64)
+    offsets = rows * (2 * n - rows - 1) // 2
+    k = np.arange(start, end, dtype=np.int64)
+    i = np.searchsorted(offsets, k, side="right") - 1
+    return i, i + 1 + k - offsets[i]
+
+def _contains(strings, subs):
+    """Elementwise `subs in strings` for unicode arrays."""
+    return np.char.find(strings, subs) >= 0
+
+def vectorized_pair_results(arrays, i, j, workers=1):
+    """Vectorized score_pair_results for index arrays i, j.
+
+    c1-c3.2 are computed with a batched C-level ratio (same values as
+    Levenshtein.ratio), c4-c7 as boolean arrays packed into bits.
+    """
+    def ratios(field):
+        memo = distinct_ratios(arrays, field)
+        if memo is not None:
+            return memo.ratios(i, j, workers)
+        return cpdist(arrays[field][i], arrays[field][j], scorer=Indel.normalized_similarity,
+                      dtype=np.float64, workers=workers)
+
+    last_a, last_b = arrays["u_lasts"][i], arrays["u_lasts"][j]
+    first_a, first_b = arrays["u_firsts"][i], arrays["u_firsts"][j]
+    prefix_a, prefix_b = arrays["u_prefixes"][i], arrays["u_prefixes"][j]
+    i_first_a, i_first_b = arrays["u_i_firsts"][i], arrays["u_i_firsts"][j]
+    i_last_a, i_last_b = arrays["u_i_lasts"][i], arrays["u_i_lasts"][j]
+
+    # If either last name is empty, c3.2 is 0.0. Modified from Bird.
+    c32 = np.where((last_a == "") | (last_b == ""), 0.0, ratios("lasts"))
+    # Since lastname and initials can be empty, perform appropriate checks
+    c4 = ((i_first_a != "") & (last_a != "") & _contains(prefix_b, i_first_a)
+          & _contains(prefix_b, last_a))
+    c5 = (i_last_a != "") & _contains(prefix_b, i_last_a) & _contains(prefix_b, first_a)
+    c6 = ((i_first_b != "") & (last_b != "") & _contains(prefix_a, i_first_b)
+          & _contains(prefix_a, last_b))
+    c7 = (i_last_b != "") & _contains(prefix_a, i_last_b) & _contains(prefix_a, first_b)
+
+    scores = np.column_stack((ratios("names"), ratios("prefixes"), ratios("firsts"), c32))
+    flags = (c4.astype(np.uint8) | c5.astype(np.uint8) << 1
+             | c6.astype(np.uint8) << 2 | c7.astype(np.uint8) << 3)
+    return PairResults(arrays, np.asarray(i, dtype=np.int32), np.asarray(j, dtype=np.int32),
+                       scores, flags)
+
+def iter_similarity_frames(devs, blocking=None, t=0.7, workers=1, filtered_only=False,
+                           chunk_size=CHUNK_SIZE, shard=None):
+    """Vectorized engine: yield similarity DataFrames of up to chunk_size pairs
+    in combinations() order, with the same values as iter_similarity.
+    workers is the number of threads used by the batched ratio computation."""
+    for results in iter_vectorized_results(devs, blocking, t, workers, filtered_only,
+                                           chunk_size, shard):
+        yield results.to_dataframe()
+
+def iter_vectorized_results(devs, blocking=None, t=0.7, workers=1, filtered_only=False,
+                            chunk_size=CHUNK_SIZE, shard=None):
+    """PairResults version of iter_similarity_frames."""
+    logging.info("Computing similarity for developers (vectorized)")
+    features = preprocess_developers(devs)
+    arrays = feature_arrays(features)
+    n = len(features)
+    pairs = select_pairs(features, blocking, t, shard)
+    if pairs is None:
+        pairs = PairRange(n, 0, n * (n - 1) // 2)
+    elif isinstance(pairs, PairList):
+        pairs = np.column_stack(pairs.index_arrays()).astype(np.int64)
+    elif not isinstance(pairs, PairRange):
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    total = len(pairs)
+
+    for start in range(0, total, chunk_size):
+        end = min(start + chunk_size, total)
+        if isinstance(pairs, PairRange):
+            i, j = pair_index_arrays(n, pairs.start + start, pairs.start + end)
+        else:
+            i, j = pairs[start:end, 0], pairs[start:end, 1]
+        results = vectorized_pair_results(arrays, i, j, workers)
+        if filtered_only:
+            results = results.filter(t)
+        yield results
+    log_ratio_memo(arrays)
 
 def filter_similarity(df, t):
     """Set similarity threshold, check c1-c3 against the threshold 
-    and require >=2 conditions OR identical emails."""
+    and require >=2 conditions OR identical emails.
+    PairResults are filtered directly and returned as PairResults."""
     logging.info("Filtering similarity with threshold %.2f", t)
+    if isinstance(df, PairResults):
+        return df.filter(t)
+    return _filter_duplicates(df, t)
+
+def _filter_duplicates(df, t):
+    """filter_similarity without logging, used for each streamed chunk."""
     df["c1_check"] = df["c1"] >= t
     df["c2_check"] = df["c2"] >= t
     df["c3_check"] = (df["c3.1"] >= t) & (df["c3.2"] >= t)
@@ -198,6 +1846,948 @@ def create_similarity_dataframe(similarity):
     df = pd.DataFrame(similarity, columns=cols)
     return df
 
+# Output formats of the all-pairs file and their file extensions
+ALL_PAIRS_FORMATS = {"csv": "csv", "csv.gz": "csv.gz", "parquet": "parquet"}
+
+def open_all_pairs_writer(outputfile, fmt, append=False):
+    """Open the all-pairs output of the given format, or append to an
+    existing csv / csv.gz file. Returns (write_chunk, close) functions."""
+    path = os.path.join("project1devs", f"{outputfile}_similarity.{ALL_PAIRS_FORMATS[fmt]}")
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        state = {"writer": None}
+
+        def write_chunk(df):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if state["writer"] is None:
+                state["writer"] = pq.ParquetWriter(path, table.schema)
+            state["writer"].write_table(table)
+
+        def close():
+            if state["writer"] is not None:
+                state["writer"].close()
+            logging.info('All pairs similarity data saved to "%s"', os.path.basename(path))
+        return write_chunk, close
+
+    mode = "a" if append else "w"
+    if fmt == "csv.gz":
+        # Appending adds a new gzip member, readers see one continuous file
+        handle = gzip.open(path, mode + "t", newline="", encoding="utf-8")
+    else:
+        handle = open(path, mode, newline="", encoding="utf-8")
+    state = {"header": not append}
+
+    def write_chunk(df):
+        df.to_csv(handle, index=False, header=state["header"])
+        state["header"] = False
+
+    def close():
+        handle.close()
+        logging.info('All pairs similarity data saved to "%s"', os.path.basename(path))
+    return write_chunk, close
+
+def stream_similarity(similarity, t, outputfile, all_pairs=True,
+                      fmt="csv", chunk_size=CHUNK_SIZE, matches=None, clusters=None):
+    """Write similarity rows from an iterable in bounded-size chunks.
+
+    Each chunk is appended to the all-pairs file (unless all_pairs is False)
+    and filtered on the fly into the _similarity_t= file, so peak memory
+    does not depend on the number of pairs. If a matches list is given,
+    the filtered rows are also appended to it, and if clusters
+    (IdentityClusters) is given, the filtered pairs are merged into it.
+    Returns the number of pairs and the number of filtered pairs.
+    """
+    return write_similarity_frames(_row_chunks(similarity, chunk_size), t, outputfile,
+                                   all_pairs, fmt, matches, clusters)
+
+def _row_chunks(similarity, chunk_size):
+    """Group similarity rows into DataFrames of at most chunk_size rows."""
+    similarity = iter(similarity)
+    while True:
+        with _PROFILER.stage("scoring"):
+            chunk = list(islice(similarity, chunk_size))
+        if not chunk:
+            return
+        with _PROFILER.stage("dataframe"):
+            df = create_similarity_dataframe(chunk)
+        yield df
+
+def write_similarity_frames(frames, t, outputfile, all_pairs=True, fmt="csv", matches=None,
+                            clusters=None):
+    """Write similarity DataFrames or PairResults to the all-pairs file
+    (unless all_pairs is False) and filter each into the _similarity_t= file.
+    Filtered pairs are also merged into clusters (IdentityClusters) if given.
+    See stream_similarity."""
+    if fmt not in ALL_PAIRS_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    # creates project1devs folder if it doesn't exists
+    ensure_output_folder()
+    write_all, close_all = open_all_pairs_writer(outputfile, fmt) if all_pairs else (None, None)
+    filtered_path = os.path.join("project1devs", f"{outputfile}_similarity_t={t}.csv")
+    cols = ["name_1", "email_1", "name_2", "email_2", "c1", "c2",
+            "c3.1", "c3.2", "c4", "c5", "c6", "c7"]
+
+    logging.info("Filtering similarity with threshold %.2f", t)
+    n_pairs = n_kept = 0
+    try:
+        with open(filtered_path, "w", newline="", encoding="utf-8") as filtered_file:
+            header = True
+            for frame in frames:
+                n_pairs += len(frame)
+                if isinstance(frame, PairResults):
+                    # Names and emails are only joined for the rows written
+                    with _PROFILER.stage("dataframe"):
+                        df = frame.to_dataframe() if write_all is not None else None
+                        df_filtered = frame.filter(t).to_dataframe()
+                    if df is not None:
+                        write_all(df)
+                else:
+                    if write_all is not None:
+                        write_all(frame)
+                    df_filtered = _filter_duplicates(frame, t)[cols]
+                n_kept += len(df_filtered)
+                if matches is not None:
+                    matches.extend(df_filtered.values.tolist())
+                if clusters is not None:
+                    clusters.add_rows(df_filtered.itertuples(index=False))
+                df_filtered.to_csv(filtered_file, index=False, header=header)
+                header = False
+            # Without any pairs, only the headers are written
+            if header:
+                df = create_similarity_dataframe([])
+                if write_all is not None:
+                    write_all(df)
+                df.to_csv(filtered_file, index=False)
+    finally:
+        if close_all is not None:
+            close_all()
+    logging.info('Filtered similarity data saved to "%s"', f"{outputfile}_similarity_t={t}.csv")
+    logging.info("Wrote %d pairs, %d kept with threshold %.2f", n_pairs, n_kept, t)
+    return n_pairs, n_kept
+
+def parse_thresholds(text):
+    """Parse comma-separated thresholds into a sorted list without duplicates."""
+    try:
+        thresholds = sorted({float(value) for value in text.split(",") if value.strip()})
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid thresholds: {text}") from e
+    if not thresholds:
+        raise argparse.ArgumentTypeError("no thresholds given")
+    return thresholds
+
+def write_similarity_sweep(frames, thresholds, outputfile, all_pairs=True, fmt="csv"):
+    """Write the filtered pairs of several thresholds from one scoring pass.
+
+    frames must hold every pair kept at the lowest threshold. For each pair
+    only the highest threshold at which it is kept is computed
+    (max_thresholds), each _similarity_t= file then gets the pairs at or
+    above its threshold. The all-pairs file is written unless all_pairs is
+    False, and a summary is saved in <outputfile>_thresholds.csv.
+    Returns the number of pairs and a dict of filtered pairs per threshold.
+    """
+    if fmt not in ALL_PAIRS_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    thresholds = sorted(thresholds)
+    ensure_output_folder()
+    write_all, close_all = open_all_pairs_writer(outputfile, fmt) if all_pairs else (None, None)
+    files = {}
+    n_pairs = 0
+    n_kept = dict.fromkeys(thresholds, 0)
+    try:
+        for t in thresholds:
+            path = os.path.join("project1devs", f"{outputfile}_similarity_t={t}.csv")
+            files[t] = open(path, "w", newline="", encoding="utf-8")
+        header = True
+        for frame in frames:
+            n_pairs += len(frame)
+            if isinstance(frame, PairResults):
+                if write_all is not None:
+                    write_all(frame.to_dataframe())
+                frame_max = frame.max_thresholds()
+                # Only pairs kept at the lowest threshold are needed from here on
+                keep = frame_max >= thresholds[0]
+                frame = PairResults(frame.arrays, frame.i[keep], frame.j[keep],
+                                    frame.scores[keep], frame.flags[keep]).to_dataframe()
+                frame_max = frame_max[keep]
+            else:
+                if write_all is not None:
+                    write_all(frame)
+                frame_max = max_thresholds(
+                    frame["c1"].to_numpy(), frame["c2"].to_numpy(),
+                    np.minimum(frame["c3.1"].to_numpy(), frame["c3.2"].to_numpy()),
+                    frame[["c4", "c5", "c6", "c7"]].sum(axis=1).to_numpy(),
+                    (frame["email_1"] == frame["email_2"]).to_numpy())
+            for t in thresholds:
+                df = frame[frame_max >= t]
+                n_kept[t] += len(df)
+                df.to_csv(files[t], index=False, header=header)
+            header = False
+        if header:
+            # Without any pairs, only the headers are written
+            df = create_similarity_dataframe([])
+            if write_all is not None:
+                write_all(df)
+            for t in thresholds:
+                df.to_csv(files[t], index=False)
+    finally:
+        for handle in files.values():
+            handle.close()
+        if close_all is not None:
+            close_all()
+
+    summary = pd.DataFrame({"threshold": thresholds,
+                            "pairs_kept": [n_kept[t] for t in thresholds]})
+    summary.to_csv(os.path.join("project1devs", f"{outputfile}_thresholds.csv"), index=False)
+    logging.info("Scored %d pairs once for %d thresholds", n_pairs, len(thresholds))
+    for t in thresholds:
+        logging.info("Threshold %.2f: %d pairs kept", t, n_kept[t])
+    logging.info('Threshold summary saved to "%s"', f"{outputfile}_thresholds.csv")
+    return n_pairs, n_kept
+
+def bird_scores(scores, flags, same_email):
+    """Combined score ranking pairs by the Bird conditions: the mean of c1,
+    c2, c3 (the smaller of c3.1 and c3.2) and c4-c7 counted as 0 or 1.
+    Pairs with identical emails score 1.0."""
+    combined = (scores[:, 0] + scores[:, 1] + np.minimum(scores[:, 2], scores[:, 3])
+                + _FLAG_COUNTS[flags]) / 7
+    return np.where(same_email, 1.0, combined)
+
+class TopKNeighbors:
+    """The k most likely aliases of each developer, ranked by bird_scores.
+
+    Each developer keeps a min-heap of at most k candidates, so memory is
+    O(n * k) whatever the number of pairs scored. Ties are broken by the
+    lower developer index. Pairs are added chunk by chunk as PairResults,
+    whose indices identify the developers even if devs has duplicate rows.
+    """
+
+    def __init__(self, devs, k):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.features = preprocess_developers(devs)
+        self.k = k
+        self.heaps = [[] for _ in range(len(self.features))]
+        self.email_ids = np.array(email_identity_ids(self.features), dtype=np.int32)
+        # Lowest score in each full heap, candidates below it are skipped
+        self._floor = np.full(len(self.features), -np.inf)
+
+    def add(self, results):
+        """Offer the pairs of a PairResults chunk to the heaps of both developers."""
+        i, j, scores, flags = results.i, results.j, results.scores, results.flags
+        if not len(i):
+            return
+        same_email = self.email_ids[i] == self.email_ids[j]
+        ranking = bird_scores(scores, flags, same_email)
+        max_t = max_thresholds(scores[:, 0], scores[:, 1],
+                               np.minimum(scores[:, 2], scores[:, 3]),
+                               _FLAG_COUNTS[flags], same_email)
+        dev = np.concatenate((i, j))
+        other = np.concatenate((j, i))
+        rows = np.tile(np.arange(len(i)), 2)
+        ranking = np.concatenate((ranking, ranking))
+        keep = ranking >= self._floor[dev]
+        dev, other, rows, ranking = dev[keep], other[keep], rows[keep], ranking[keep]
+        # Only the k best candidates of a developer in this chunk can enter its heap
+        order = np.lexsort((other, -ranking, dev))
+        grouped = dev[order]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        order = order[rank < self.k]
+
+        for d, b, r, score in zip(dev[order].tolist(), other[order].tolist(),
+                                  rows[order].tolist(), ranking[order].tolist()):
+            heap = self.heaps[d]
+            entry = (score, -b)
+            if len(heap) == self.k and entry <= heap[0][:2]:
+                continue
+            entry += (min(float(max_t[r]), 1.0), tuple(scores[r].tolist()), int(flags[r]))
+            if len(heap) < self.k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+            if len(heap) == self.k:
+                self._floor[d] = heap[0][0]
+
+    def neighbors(self, i):
+        """Candidates of developer i, best first, as (index, score,
+        max_threshold, scores, flags) tuples."""
+        return [(-b, score, max_t, scores, flags)
+                for score, b, max_t, scores, flags in sorted(self.heaps[i], reverse=True)]
+
+def write_top_k(neighbors, outputfile):
+    """Save the ranked candidates of each developer to
+    <outputfile>_top_k=<k>.csv for manual review.
+
+    One row per developer and candidate, best first: the developer, rank,
+    the candidate, the combined score, max_threshold (the highest -t at
+    which the pair is a duplicate, 1.0 for any) and conditions c1-c7.
+    Returns the number of rows.
+    """
+    ensure_output_folder()
+    features = neighbors.features
+    filename = f"{outputfile}_top_k={neighbors.k}.csv"
+    n_rows = 0
+    with open(os.path.join("project1devs", filename), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=",", quotechar='"')
+        writer.writerow(["name_1", "email_1", "rank", "name_2", "email_2", "score",
+                         "max_threshold", *PairResults.SCORE_COLUMNS,
+                         *PairResults.FLAG_COLUMNS])
+        for i in range(len(features)):
+            for rank, (b, score, max_t, scores, flags) in enumerate(neighbors.neighbors(i), 1):
+                writer.writerow([features.raw_names[i], features.emails[i], rank,
+                                 features.raw_names[b], features.emails[b], score, max_t,
+                                 *scores, *(bool(flags >> bit & 1) for bit in range(4))])
+                n_rows += 1
+    logging.info('Saved top %d candidates of each developer to "%s"', neighbors.k, filename)
+    return n_rows
+
+def parse_shard(text):
+    """Parse a shard "i/N" into (i, N), 1 <= i <= N."""
+    try:
+        index, count = (int(value) for value in text.split("/"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid shard: {text}, expected i/N") from e
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard: {text}, i must be 1 to N")
+    return index, count
+
+def shard_prefix(outputfile, index, count):
+    """Output file prefix of a shard, e.g. devs.shard-2-of-4."""
+    return f"{outputfile}.shard-{index}-of-{count}"
+
+def developers_digest(devs):
+    """SHA-1 of the developer names and emails, in order."""
+    digest = hashlib.sha1()
+    for name, email in devs:
+        digest.update(f"{name}\x00{email}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def save_shard_manifest(outputfile, shard, t, devs, blocking, all_pairs, n_pairs, n_kept):
+    """Save <outputfile>.shard-<i>-of-<N>.manifest.json describing a shard:
+    its settings, input developers, pair counts and the SHA-1 of its part
+    files, which merge_shards checks."""
+    prefix = shard_prefix(outputfile, *shard)
+    files = {"similarity_t": f"{prefix}_similarity_t={t}.csv"}
+    if all_pairs:
+        files["similarity"] = f"{prefix}_similarity.csv"
+    manifest = {"shard": shard[0], "shards": shard[1], "threshold": t,
+                "heuristic_version": HEURISTIC_VERSION, "developers": len(devs),
+                "developers_sha1": developers_digest(devs),
+                "blocking": None if blocking is None else str(blocking),
+                "pairs": n_pairs, "pairs_kept": n_kept,
+                "files": {kind: {"name": name,
+                                 "sha1": _file_sha1(os.path.join("project1devs", name))}
+                          for kind, name in files.items()}}
+    with open(os.path.join("project1devs", f"{prefix}.manifest.json"), "w",
+              encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logging.info('Saved shard manifest to "%s"', f"{prefix}.manifest.json")
+
+def _concat_csv_parts(paths, output_path):
+    """Concatenate CSV files with the same header, keeping the first header."""
+    header = None
+    with open(output_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as part:
+                part_header = part.readline()
+                if header is None:
+                    header = part_header
+                    out.write(header)
+                elif part_header != header:
+                    raise ValueError(f"{os.path.basename(path)} has a different header")
+                shutil.copyfileobj(part, out)
+
+def merge_shards(outputfile):
+    """Merge the part files of all shards of outputfile in shard order.
+
+    Every shard 1..N must have a manifest with the same settings and input
+    developers, and unchanged part files. The result is byte-identical to
+    the _similarity_t= (and all-pairs) file of a single-node run.
+    Raises ValueError if shards are missing or inconsistent.
+    Returns the number of pairs and the number of filtered pairs.
+    """
+    pattern = re.compile(re.escape(outputfile) + r"\.shard-\d+-of-\d+\.manifest\.json")
+    manifests = []
+    for name in sorted(os.listdir("project1devs")):
+        if pattern.fullmatch(name):
+            with open(os.path.join("project1devs", name), "r", encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError(f"No shard manifests found for {outputfile}")
+    counts = sorted({manifest["shards"] for manifest in manifests})
+    if len(counts) > 1:
+        raise ValueError(f"Shard manifests of different shard counts {counts}")
+    count = counts[0]
+    shards = {manifest["shard"]: manifest for manifest in manifests}
+    missing = [index for index in range(1, count + 1) if index not in shards]
+    if missing:
+        raise ValueError(f"Missing shards {missing} of {count}")
+    first = shards[1]
+    for key in ("threshold", "heuristic_version", "developers", "developers_sha1", "blocking"):
+        if any(shards[index][key] != first[key] for index in shards):
+            raise ValueError(f"Shards differ in {key}")
+    if any(set(shards[index]["files"]) != set(first["files"]) for index in shards):
+        raise ValueError("Shards differ in the files written (--filtered-only)")
+    for index in range(1, count + 1):
+        for part in shards[index]["files"].values():
+            path = os.path.join("project1devs", part["name"])
+            if not os.path.exists(path) or _file_sha1(path) != part["sha1"]:
+                raise ValueError(f"Part file {part['name']} is missing or changed")
+
+    t = first["threshold"]
+    outputs = {"similarity_t": f"{outputfile}_similarity_t={t}.csv",
+               "similarity": f"{outputfile}_similarity.csv"}
+    for kind in first["files"]:
+        _concat_csv_parts([os.path.join("project1devs", shards[index]["files"][kind]["name"])
+                           for index in range(1, count + 1)],
+                          os.path.join("project1devs", outputs[kind]))
+        logging.info('Merged %d shards into "%s"', count, outputs[kind])
+    n_pairs = sum(manifest["pairs"] for manifest in shards.values())
+    n_kept = sum(manifest["pairs_kept"] for manifest in shards.values())
+    logging.info("Merged %d pairs, %d kept with threshold %.2f", n_pairs, n_kept, t)
+    return n_pairs, n_kept
+
+# Version of the similarity heuristic, stored in the similarity cache.
+# Bump it when scoring or filtering changes so that cached results are recomputed.
+HEURISTIC_VERSION = 1
+
+def similarity_cache_path(outputfile):
+    """Path of the incremental similarity cache."""
+    return os.path.join("project1devs", f"{outputfile}_similarity.cache.json")
+
+def load_similarity_cache(outputfile):
+    """Load the similarity cache of a previous run, or None if there is none."""
+    path = similarity_cache_path(outputfile)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# Blocking modes whose matches are exact and can be cached (None is all pairs)
+EXACT_BLOCKING = (None, "lossless")
+
+def _all_pairs_fingerprint(outputfile, fmt):
+    """Size and SHA-1 of the all-pairs file of the given format, or None
+    if there is no such file."""
+    path = os.path.join("project1devs", f"{outputfile}_similarity.{ALL_PAIRS_FORMATS[fmt]}")
+    if not os.path.exists(path):
+        return None
+    return {"size": os.path.getsize(path), "sha1": _file_sha1(path)}
+
+def save_similarity_cache(devs, t, matches, all_pairs_format, outputfile, blocking=None):
+    """Save the developer list, threshold, blocking mode and filtered matches
+    of a run. all_pairs_format is the format of the all-pairs file written,
+    or None; the size and SHA-1 of that file are stored so that it is only
+    appended to while it still holds the cached pairs. Matches of approximate
+    blocking modes may be incomplete, so they are not cached and an existing
+    cache is removed."""
+    path = similarity_cache_path(outputfile)
+    if blocking not in EXACT_BLOCKING:
+        logging.warning("Matches of %s blocking are not exact, no similarity cache saved",
+                        "minhash" if isinstance(blocking, MinHashLSH) else blocking)
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    ensure_output_folder()
+    cache = {"version": HEURISTIC_VERSION, "threshold": t, "blocking": blocking,
+             "all_pairs_format": all_pairs_format,
+             "all_pairs": (None if all_pairs_format is None else
+                           _all_pairs_fingerprint(outputfile, all_pairs_format)),
+             "developers": [list(dev[:2]) for dev in devs], "matches": matches}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def _cached_positions(cache, devs, t, all_pairs, fmt, outputfile, blocking=None):
+    """Positions of the cached developers in devs, or None if the cache
+    cannot be used for this run."""
+    if cache is None:
+        return None
+    if cache["version"] != HEURISTIC_VERSION or cache["threshold"] != t:
+        logging.info("Similarity cache is for another heuristic version or threshold")
+        return None
+    # Caches without a blocking mode may hold matches of approximate blocking
+    if blocking not in EXACT_BLOCKING or "blocking" not in cache \
+            or cache["blocking"] != blocking:
+        logging.info("Similarity cache is for another blocking mode")
+        return None
+    if all_pairs:
+        if fmt == "parquet" or cache["all_pairs_format"] != fmt:
+            logging.info("All-pairs file cannot be appended to")
+            return None
+        # The file may have been rewritten by a run without --incremental
+        saved = cache.get("all_pairs")
+        if saved is None or _all_pairs_fingerprint(outputfile, fmt) != saved:
+            logging.info("All-pairs file does not match the similarity cache")
+            return None
+    index = {tuple(dev[:2]): i for i, dev in enumerate(devs)}
+    if len(index) != len(devs):
+        logging.info("Developer list has repeated entries")
+        return None
+    positions = [index.get(tuple(dev)) for dev in cache["developers"]]
+    # Cached developers must still be present, in the same relative order,
+    # so that cached rows keep their orientation
+    if None in positions or positions != sorted(positions):
+        logging.info("Developers were removed or reordered since the cached run")
+        return None
+    return positions
+
+def _pairs_with_new(n, new):
+    """Pairs (i, j) in combinations(range(n), 2) order where i or j is new."""
+    new_sorted = sorted(new)
+    for i in range(n):
+        if i in new:
+            yield from ((i, j) for j in range(i + 1, n))
+        else:
+            yield from ((i, j) for j in new_sorted[bisect.bisect_right(new_sorted, i):])
+
+def update_similarity(devs, t, outputfile, all_pairs=True, fmt="csv",
+                      chunk_size=CHUNK_SIZE, workers=1, clusters=None, blocking=None):
+    """Update similarity outputs using the cache of the previous run.
+
+    Only pairs involving developers that are not in the cache are scored,
+    with "lossless" blocking only their candidate pairs. The cache must be
+    of the same blocking mode, approximate modes are never cached.
+    New pairs are appended to the all-pairs file, and the _similarity_t= file
+    is rewritten with the cached and new matches in combinations() order.
+    All matches are merged into clusters (IdentityClusters) if given.
+    Returns the number of new pairs and filtered pairs, or None if the
+    cache is missing or invalid (the caller should do a full run).
+    """
+    cache = load_similarity_cache(outputfile)
+    positions = _cached_positions(cache, devs, t, all_pairs, fmt, outputfile, blocking)
+    if positions is None:
+        return None
+
+    features = preprocess_developers(devs)
+    n = len(features)
+    new = set(range(n)) - set(positions)
+    if blocking == "lossless":
+        index = IdentityIndex(features, t)
+        pairs = sorted({(min(i, j), max(i, j)) for i in new
+                        for j in index.candidates(features, i) if j != i})
+    else:
+        pairs = list(_pairs_with_new(n, new))
+    logging.info("Incremental similarity: %d new developers, %d pairs to score",
+                 len(new), len(pairs))
+
+    new_matches = []
+    write_all, close_all = (open_all_pairs_writer(outputfile, fmt, append=True)
+                            if all_pairs else (None, None))
+    similarity = score_pairs(features, pairs, workers, None if all_pairs else t)
+    try:
+        while True:
+            chunk = list(islice(similarity, chunk_size))
+            if not chunk:
+                break
+            df = create_similarity_dataframe(chunk)
+            if write_all is not None:
+                write_all(df)
+            new_matches.extend(_filter_duplicates(df, t).iloc[:, :12].values.tolist())
+    finally:
+        if close_all is not None:
+            close_all()
+
+    # Merge cached and new matches into combinations() order
+    index = {tuple(dev[:2]): i for i, dev in enumerate(devs)}
+    matches = sorted(cache["matches"] + new_matches,
+                     key=lambda row: (index[(row[0], row[1])], index[(row[2], row[3])]))
+    save_similarity_df(create_similarity_dataframe(matches), t, outputfile)
+    save_similarity_cache(devs, t, matches, fmt if all_pairs else None, outputfile, blocking)
+    if clusters is not None:
+        clusters.add_rows(matches)
+    return len(pairs), len(new_matches)
+
+class UnionFind:
+    """Union-find over integer ids with path compression and union by size.
+    New ids can be added and pairs united at any time."""
+    __slots__ = ("parent", "size")
+
+    def __init__(self, n=0):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def __len__(self):
+        return len(self.parent)
+
+    def grow(self, n):
+        """Add singleton ids up to n."""
+        for i in range(len(self.parent), n):
+            self.parent.append(i)
+            self.size.append(1)
+
+    def find(self, i):
+        """Return the root of i, compressing the path on the way."""
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        """Unite the sets of i and j. Returns False if they were already united."""
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return False
+        if self.size[root_i] < self.size[root_j]:
+            root_i, root_j = root_j, root_i
+        self.parent[root_j] = root_i
+        self.size[root_i] += self.size[root_j]
+        return True
+
+class IdentityClusters:
+    """Clusters of duplicate developers, built from a stream of duplicate pairs.
+
+    Developers are identified by (name, email). New developers and new
+    pairs can be added at any time, e.g. by an incremental run.
+    """
+    def __init__(self, devs=()):
+        self.devs = []
+        self.index = {}
+        self.union_find = UnionFind()
+        self.add_developers(devs)
+
+    def add_developers(self, devs):
+        """Add developers not seen before as singleton clusters."""
+        for dev in devs:
+            dev = (dev[0], dev[1])
+            if dev not in self.index:
+                self.index[dev] = len(self.devs)
+                self.devs.append(dev)
+        self.union_find.grow(len(self.devs))
+
+    def add_pairs(self, pairs):
+        """Unite developer index pairs."""
+        for i, j in pairs:
+            self.union_find.union(i, j)
+
+    def add_rows(self, rows):
+        """Unite the developers of similarity rows (name_1, email_1, name_2, email_2, ...)."""
+        index = self.index
+        for row in rows:
+            self.union_find.union(index[(row[0], row[1])], index[(row[2], row[3])])
+
+    def clusters(self):
+        """Clusters with at least two members, as sorted index lists,
+        ordered by their first member."""
+        groups = {}
+        for i in range(len(self.devs)):
+            groups.setdefault(self.union_find.find(i), []).append(i)
+        return [members for members in groups.values() if len(members) > 1]
+
+def write_aliases(clusters, outputfile):
+    """Save identity clusters to <outputfile>_aliases.csv.
+
+    One row per cluster: cluster id, canonical identity (the first member
+    in developer order) and all members as "name <email>" joined by "; ".
+    """
+    ensure_output_folder()
+    groups = clusters.clusters()
+    with open(os.path.join("project1devs", f"{outputfile}_aliases.csv"),
+              'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, delimiter=',', quotechar='"')
+        writer.writerow(["cluster_id", "canonical_name", "canonical_email", "size", "members"])
+        for cluster_id, members in enumerate(groups):
+            name, email = clusters.devs[members[0]]
+            writer.writerow([cluster_id, name, email, len(members),
+                             "; ".join(f"{clusters.devs[i][0]} <{clusters.devs[i][1]}>"
+                                       for i in members)])
+    logging.info('Saved %d identity clusters to "%s"', len(groups), f"{outputfile}_aliases.csv")
+    return groups
+
+class IdentityIndex:
+    """In-memory index of developers for matching one identity at a time.
+
+    An identity is scored only against developers with an identical email
+    or that can meet two of the conditions, found like in the "lossless"
+    blocking mode: c1-c3 from prefix-filtering postings of the names, email
+    prefixes and last names, c4-c7 from character and bigram postings. The
+    index is exact at threshold t and any higher threshold.
+    """
+
+    def __init__(self, devs, t=0.7):
+        self.features = features = preprocess_developers(devs)
+        self.t = t
+        self.emails = {}
+        for i, email in enumerate(features.emails):
+            self.emails.setdefault(email, []).append(i)
+        # No ratio reaches t > 1, and every ratio reaches t <= 0
+        if 0 < t <= 1:
+            self.ratio_indexes = (_RatioIndex(features.names, t),
+                                  _RatioIndex(features.prefixes, t),
+                                  # c3.2 is 0.0 if either last name is empty
+                                  _RatioIndex(features.lasts, t, match_empty=False))
+        # Prefix grams for the query's last / first name in a developer's prefix (c4, c5)
+        self.grams = {}
+        for i, prefix in enumerate(features.prefixes):
+            for gram in _grams(prefix):
+                self.grams.setdefault(gram, []).append(i)
+        # A developer's last / first name in the query's prefix (c6, c7),
+        # keyed by the first bigram which the query prefix must contain
+        self.last_keys, self.first_keys = {}, {}
+        for i in range(len(features)):
+            last, first = features.lasts[i], features.firsts[i]
+            if features.i_firsts[i] != "" and last != "":
+                self.last_keys.setdefault(last[:2], []).append(i)
+            if features.i_lasts[i] != "":
+                self.first_keys.setdefault(first[:2], []).append(i)
+
+    def __len__(self):
+        return len(self.features)
+
+    def _substring_candidates(self, pattern, initial, after=-1):
+        """Developers after the given index whose prefix contains pattern and initial."""
+        if initial == "":
+            return []
+        keys = [initial] + ([pattern] if len(pattern) == 1 else
+                            [pattern[k:k + 2] for k in range(len(pattern) - 1)])
+        # Every match contains all of the keys; probe the rarest one
+        posting = min((self.grams.get(key, []) for key in keys), key=len)
+        prefixes = self.features.prefixes
+        return [b for b in posting[bisect.bisect_right(posting, after):]
+                if pattern in prefixes[b] and initial in prefixes[b]]
+
+    def candidates(self, query, q=0, after=-1):
+        """Developers that may match developer q of query, a DeveloperFeatures
+        table. Only developers with an index larger than after are returned."""
+        features = self.features
+        if self.t <= 0:
+            # Every pair passes c1 and c2, nothing can be pruned
+            return range(after + 1, len(features))
+        name, prefix = query.names[q], query.prefixes[q]
+        first, last = query.firsts[q], query.lasts[q]
+        conditions = []
+        if self.t <= 1:
+            conditions += [self.ratio_indexes[0].candidates(name, after),
+                           self.ratio_indexes[1].candidates(prefix, after),
+                           self.ratio_indexes[2].candidates(last, after) if last != "" else ()]
+        conditions += [self._substring_candidates(last, query.i_firsts[q] if last else "", after),
+                       self._substring_candidates(first, query.i_lasts[q], after)]
+        # c6 / c7: the developer's initial and name part in the query's prefix
+        grams = _grams(prefix) | {""}
+        for keys, parts, initials in ((self.last_keys, features.lasts, features.i_firsts),
+                                      (self.first_keys, features.firsts, features.i_lasts)):
+            conditions.append([b for gram in grams for b in keys.get(gram, ())
+                               if b > after and parts[b] in prefix and initials[b] in prefix])
+        # Bit per condition, a developer needs two distinct bits
+        bits = {}
+        for bit, found in enumerate(conditions):
+            for b in found:
+                bits[b] = bits.get(b, 0) | 1 << bit
+        found = {b for b, mask in bits.items() if bin(mask).count("1") >= 2}
+        same_email = self.emails.get(query.emails[q], [])
+        found.update(same_email[bisect.bisect_right(same_email, after):])
+        return sorted(found)
+
+    def match(self, name, email, t=None):
+        """Developers that are duplicates of (name, email) at threshold t
+        (at least the index threshold), best first by bird_scores.
+        Returns (index, score_pair row, score) tuples."""
+        t = self.t if t is None else t
+        if t < self.t:
+            raise ValueError(f"threshold must be at least {self.t}")
+        query = DeveloperFeatures([(name, email)])
+        candidates = self.candidates(query)
+        # Score the query against its candidates in one small table
+        table = DeveloperFeatures.from_columns(
+            [getattr(query, field) + [getattr(self.features, field)[b] for b in candidates]
+             for field in DeveloperFeatures.__slots__])
+        matches = []
+        for k, b in enumerate(candidates, 1):
+            row = score_pair_filtered(table, 0, k, t)
+            if row is not None:
+                matches.append((b, row))
+        if not matches:
+            return []
+        scores = np.array([row[4:8] for _, row in matches], dtype=np.float64)
+        flags = np.array([sum(row[8 + bit] << bit for bit in range(4)) for _, row in matches],
+                         dtype=np.uint8)
+        same_email = np.array([row[1] == row[3] for _, row in matches])
+        ranked = bird_scores(scores, flags, same_email).tolist()
+        return sorted(((b, row, score) for (b, row), score in zip(matches, ranked)),
+                      key=lambda match: (-match[2], match[0]))
+
+# Seconds between checks of the served CSV for changes
+RELOAD_INTERVAL = 2.0
+
+# Request latencies kept for the percentiles of /stats
+LATENCY_WINDOW = 10_000
+
+class MatchService:
+    """Long-running matching service over project1devs/<file>.csv.
+
+    The developers are loaded once into an IdentityIndex and reloaded
+    when the CSV changes. Requests are HTTP/1.1 with JSON bodies, over TCP
+    or a Unix socket:
+      POST /match  {"name": ..., "email": ...} or {"queries": [...]},
+                   optional "threshold" (not below -t)
+      GET /stats   developers, reloads, request count and latency percentiles
+      GET /health
+    """
+
+    def __init__(self, file, t=0.7, snapshot=False, devs=None):
+        self.file = file
+        self.t = t
+        self.snapshot = snapshot
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = self.queries = self.reloads = 0
+        self.index = None
+        self._signature = None
+        self._swap(*self._load(devs))
+
+    def _csv_signature(self):
+        stat = os.stat(os.path.join("project1devs", f"{self.file}.csv"))
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load(self, devs=None):
+        """Read the developers and build their index."""
+        signature = self._csv_signature()
+        if devs is None:
+            devs = read_developers_snapshot(self.file) if self.snapshot \
+                else read_developers(self.file)
+        return IdentityIndex(devs, self.t), signature
+
+    def _swap(self, index, signature):
+        self.index, self._signature = index, signature
+        logging.info("Serving %d developers from %s.csv", len(index), self.file)
+
+    def reload_if_changed(self):
+        """Reload the developers if the CSV changed. Returns whether it did."""
+        if self._csv_signature() == self._signature:
+            return False
+        self._swap(*self._load())
+        self.reloads += 1
+        return True
+
+    async def _watch(self, interval):
+        """Reload in a worker thread when the CSV changes, queries are
+        answered from the old index meanwhile."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._csv_signature() != self._signature:
+                    self._swap(*await loop.run_in_executor(None, self._load))
+                    self.reloads += 1
+            except (OSError, ValueError) as e:
+                logging.error("Failed to reload developers: %s", e)
+
+    def _match(self, query, t):
+        if not isinstance(query, dict) or not isinstance(query.get("name", ""), str) \
+                or not isinstance(query.get("email"), str):
+            raise ValueError("a query needs a string email and name")
+        matches = []
+        for _, row, score in self.index.match(query.get("name", ""), query["email"], t):
+            match = {"name": row[2], "email": row[3], "score": score}
+            match.update(zip(PairResults.SCORE_COLUMNS + PairResults.FLAG_COLUMNS, row[4:]))
+            matches.append(match)
+        return {"matches": matches}
+
+    def stats(self):
+        """Service counters and request latency percentiles in ms."""
+        latencies = np.array(self.latencies) * 1000
+        percentiles = {f"p{q}": float(np.percentile(latencies, q)) if len(latencies) else None
+                       for q in (50, 90, 99)}
+        return {"developers": len(self.index), "threshold": self.t, "reloads": self.reloads,
+                "requests": self.requests, "queries": self.queries,
+                "latency_ms": {**percentiles,
+                               "max": float(latencies.max()) if len(latencies) else None}}
+
+    def handle(self, method, path, body=b""):
+        """Answer one request, returns the HTTP status and a JSON-able payload."""
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "developers": len(self.index)}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if path != "/match":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        start = time.perf_counter()
+        try:
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("the body must be a JSON object")
+            t = request.get("threshold")
+            if "queries" in request:
+                results = [self._match(query, t) for query in request["queries"]]
+                payload = {"results": results}
+            else:
+                results = [self._match(request, t)]
+                payload = results[0]
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        # Queries of rejected requests are not counted
+        self.queries += len(results)
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - start)
+        return 200, payload
+
+    async def _handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests of one connection, kept alive unless
+        the client asks to close it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line.strip() == b"":
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                    body = await reader.readexactly(int(headers.get("content-length", 0)))
+                    status, payload = self.handle(method, path, body)
+                except ValueError:
+                    status, payload = 400, {"error": "malformed request"}
+                    keep_alive = False
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write((f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                              "Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                              ).encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address):
+        """Start listening on "host:port", "port" or "unix:<path>"."""
+        if address.startswith("unix:"):
+            server = await asyncio.start_unix_server(self._handle_connection, path=address[5:])
+        else:
+            host, _, port = address.rpartition(":")
+            server = await asyncio.start_server(self._handle_connection,
+                                                host or "127.0.0.1", int(port))
+        logging.info("Listening on %s", address)
+        return server
+
+    async def serve(self, address, reload_interval=RELOAD_INTERVAL):
+        """Serve until cancelled, reloading the developers when the CSV changes."""
+        server = await self.start(address)
+        watcher = asyncio.create_task(self._watch(reload_interval))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            if address.startswith("unix:") and os.path.exists(address[5:]):
+                os.remove(address[5:])
+
 def ensure_output_folder():
     """Ensure that the output folder 'project1devs' exists."""
     os.makedirs("project1devs", exist_ok=True)
@@ -222,23 +2812,110 @@ def parse_args():
 
     parser.add_argument('-t', '--threshold', type=float, default=0.7,
                         metavar='', help='Similarity threshold (default: 0.7)')
+    parser.add_argument('--thresholds', type=parse_thresholds, default=None, metavar='',
+                        help='Comma-separated thresholds, e.g. 0.7,0.8,0.9,0.95.\n'
+                        'Pairs are scored once and filtered for each threshold')
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='',
+                        help='Score only shard i/N of the pairs, e.g. 2/4, into part files\n'
+                        'and a manifest (project1devs/<file>.shard-<i>-of-<N>.*)')
+    parser.add_argument('--merge-shards', action='store_true',
+                        help='Merge the part files of all shards of --file into the\n'
+                        'similarity files of a single run')
+    parser.add_argument('--serve', type=str, default=None, metavar='',
+                        help='Run a matching service for <file>.csv on "host:port", "port"\n'
+                        'or "unix:<path>" (HTTP, POST /match, GET /stats)')
+    parser.add_argument('--top-k', type=int, default=None, metavar='',
+                        help='Instead of the similarity files, save the K most likely\n'
+                        'aliases of each developer in project1devs/<file>_top_k=<K>.csv')
     parser.add_argument('-f', '--file', type=str, default='devs',
                         metavar='', help='File name prefix for input CSV and ' \
                         'for output similarity files (default: devs)')
-    parser.add_argument('-r', '--repo', type=str, default=None,
-                        metavar='', help='Optional Git repo URL or path')
+    parser.add_argument('-r', '--repo', type=str, nargs='+', default=None,
+                        metavar='', help='Optional Git repo URL or path. With several\n'
+                        'repositories, they are mined concurrently into one pooled CSV')
+    parser.add_argument('--repos-file', type=str, default=None, metavar='',
+                        help='Manifest file with one repository URL or path per line,\n'
+                        'mined like several --repo')
+    parser.add_argument('-j', '--mining-workers', type=int, default=MINING_WORKERS,
+                        metavar='', help='Repositories mined at the same time\n'
+                        f'(default: {MINING_WORKERS})')
+    parser.add_argument('--backend', type=str, default='git',
+                        choices=MINING_BACKENDS, metavar='',
+                        help='Mining backend for --repo: "git" streams identities from\n'
+                        'git log (falls back to PyDriller), "pydriller" (default: git)')
+    parser.add_argument('--clone-cache', type=str, default=None, metavar='',
+                        help='Directory of persistent clones of remote repositories.\n'
+                        'Later runs only fetch new commits (git backend)')
+    parser.add_argument('--clone-cache-size', type=float, default=CLONE_CACHE_SIZE_MB,
+                        metavar='', help='Size limit of --clone-cache in MB, least recently\n'
+                        f'used clones are removed (default: {CLONE_CACHE_SIZE_MB})')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse the previous run: with --repo only walk new commits\n'
+                        '(watermark in project1devs/<file>.watermark.json), and only\n'
+                        'score pairs with new developers (project1devs/\n'
+                        '<file>_similarity.cache.json)')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='Keep the pre-processed developers in a binary snapshot\n'
+                        '(project1devs/<file>.snapshot), used while <file>.csv is unchanged')
+    parser.add_argument('-b', '--blocking', type=str, default=None,
+                        choices=BLOCKING_MODES, metavar='',
+                        help='Only score candidate pairs (default: all pairs).\n'
+                        '"lossless" keeps every pair that passes threshold -t,\n'
+                        '"keys" uses heuristic blocking keys and may miss pairs,\n'
+                        '"minhash" finds similar names and email prefixes approximately')
+    parser.add_argument('--lsh-bands', type=int, default=MINHASH_BANDS, metavar='',
+                        help=f'LSH bands of --blocking minhash (default: {MINHASH_BANDS})')
+    parser.add_argument('--lsh-rows', type=int, default=MINHASH_ROWS, metavar='',
+                        help=f'Rows per LSH band of --blocking minhash (default: {MINHASH_ROWS})')
+    parser.add_argument('--lsh-recall', action='store_true',
+                        help='Log the recall of --blocking minhash against the exact result')
+    parser.add_argument('--filtered-only', action='store_true',
+                        help='Only compute and save the filtered pairs (threshold -t),\n'
+                        'skipping the all-pairs file. Uses early exit in scoring')
+    parser.add_argument('--format', type=str, default='csv',
+                        choices=list(ALL_PAIRS_FORMATS), metavar='',
+                        help='Format of the all-pairs file: csv, csv.gz or parquet\n'
+                        '(parquet requires pyarrow, default: csv)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='',
+                        help=f'Pairs written per chunk (default: {CHUNK_SIZE})')
+    parser.add_argument('--aliases', action='store_true',
+                        help='Also group duplicate pairs into identity clusters,\n'
+                        'saved in <file>_aliases.csv')
+    parser.add_argument('--profile', action='store_true',
+                        help='Save wall time, CPU time, peak memory and item counts\n'
+                        'per stage in <file>_profile.json')
+    parser.add_argument('--profile-pstats', action='store_true',
+                        help='Also save a cProfile dump of the scoring and writing loop\n'
+                        'in <file>_profile.pstats (implies --profile)')
+    parser.add_argument('-e', '--engine', type=str, default='python',
+                        choices=ENGINES, metavar='',
+                        help='Similarity engine: "python" scores pair by pair,\n'
+                        '"vectorized" scores chunks of pairs as NumPy columns\n'
+                        '(default: python)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        metavar='', help='Number of processes for pair scoring, or threads\n'
+                        'with the vectorized engine (default: 1)')
 
     return parser.parse_args()
 
-def fetch_or_read_developers(file: str, repo_url: str = None):
+def fetch_or_read_developers(file: str, repo_url: str = None, mining_options: dict = None,
+                             snapshot: bool = False):
     """
     Ensures developer data is available, either by fetching from repo or reading CSV.
+    repo_url can also be a list of repositories, mined into one pooled CSV.
+    mining_options are passed on to load_developers_from_repo(s).
+    With snapshot, the CSV is read through read_developers_snapshot.
     Returns a list of developers, or an empty list if data could not be retrieved.
     """
     if repo_url:
-        logging.info("Fetching developers from repository: %s", repo_url)
+        if isinstance(repo_url, str):
+            logging.info("Fetching developers from repository: %s", repo_url)
         try:
-            load_developers_from_repo(repo_url, file)
+            with _PROFILER.stage("fetch"):
+                if isinstance(repo_url, str):
+                    load_developers_from_repo(repo_url, file, **(mining_options or {}))
+                else:
+                    load_developers_from_repos(repo_url, file, **(mining_options or {}))
         except Exception as e:
             logging.error("Failed to load developers from repo: %s", e)
             return []
@@ -252,7 +2929,8 @@ def fetch_or_read_developers(file: str, repo_url: str = None):
         logging.error('CSV file "%s" not found. Run with --repo to fetch data first.', csv_path)
         return []
 
-    return read_developers(file)
+    with _PROFILER.stage("read_developers"):
+        return read_developers_snapshot(file) if snapshot else read_developers(file)
 
 def main():
     """ 
@@ -270,22 +2948,170 @@ def main():
 
     t = args.threshold
     file = args.file
-    repo_url = args.repo
+    repos = list(args.repo or [])
+    if args.repos_file:
+        try:
+            repos.extend(read_repo_manifest(args.repos_file))
+        except OSError as e:
+            logging.error("Failed to read repository manifest: %s", e)
+            return
+    # A single repository keeps its own CSV and incremental watermark
+    repo_url = repos[0] if len(repos) == 1 else repos or None
 
-    devs = fetch_or_read_developers(file, repo_url)
+    if args.profile or args.profile_pstats:
+        ensure_output_folder()
+        pstats_path = os.path.join("project1devs", f"{file}_profile.pstats") \
+            if args.profile_pstats else None
+        set_profiler(StageProfiler(pstats_path))
+    try:
+        run(args, t, file, repo_url)
+    finally:
+        profiler = set_profiler(NullProfiler())
+        if profiler.enabled:
+            profiler.save(os.path.join("project1devs", f"{file}_profile.json"))
+
+def run(args, t, file, repo_url):
+    """Run the stages of main() with the parsed arguments."""
+    if args.merge_shards:
+        try:
+            with _PROFILER.stage("merge_shards"):
+                merge_shards(file)
+        except (OSError, ValueError) as e:
+            logging.error("Failed to merge shards: %s", e)
+        return
+    mining_options = {"backend": args.backend, "incremental": args.incremental}
+    if isinstance(repo_url, list):
+        mining_options["workers"] = args.mining_workers
+    if args.clone_cache:
+        mining_options["clone_cache"] = CloneCache(args.clone_cache, args.clone_cache_size)
+    devs = fetch_or_read_developers(file, repo_url, mining_options, args.snapshot)
     if not devs:
         return
+    _PROFILER.count("identities", len(devs))
 
-    similarity = compute_similarity(devs)
+    if args.serve:
+        service = MatchService(file, t, args.snapshot, devs)
+        try:
+            asyncio.run(service.serve(args.serve))
+        except KeyboardInterrupt:
+            logging.info("Matching service stopped")
+        return
 
-    # Create a dataframe
-    df = create_similarity_dataframe(similarity)
+    if args.blocking == "minhash":
+        args.blocking = MinHashLSH(args.lsh_bands, args.lsh_rows)
+        if args.lsh_recall:
+            with _PROFILER.stage("lsh_recall"):
+                t_min = args.thresholds[0] if args.thresholds else t
+                recall, n_exact = candidate_recall(
+                    devs, candidate_pairs(devs, args.blocking, t_min), t_min)
+            logging.info("MinHash recall at threshold %.2f: %.4f of %d exact pairs",
+                         t_min, recall, n_exact)
 
-    # Save data on all pairs (might be too big -> comment out to avoid)
-    df = save_all_pairs(df, file)
+    all_pairs = not args.filtered_only
+    if args.shard is not None:
+        run_shard(args, devs, file, t, all_pairs)
+        return
+    if args.top_k is not None:
+        run_top_k(args, devs, file, t)
+        return
+    if args.thresholds:
+        run_threshold_sweep(args, devs, file, all_pairs)
+        return
 
-    df_filtered = filter_similarity(df, t)
-    save_similarity_df(df_filtered, t, file)
+    clusters = IdentityClusters(devs) if args.aliases else None
+    # Only score pairs with new developers if the previous run can be reused
+    updated = None
+    if args.incremental:
+        with _PROFILER.stage("update_similarity"), _PROFILER.hot_loop():
+            updated = update_similarity(devs, t, file, all_pairs, args.format,
+                                        args.chunk_size, args.workers, clusters,
+                                        args.blocking)
+    if updated is not None:
+        n_pairs, n_kept = updated
+    else:
+        frames = similarity_frames(devs, args, t)
+        matches = [] if args.incremental else None
+        try:
+            with _PROFILER.stage("write"), _PROFILER.hot_loop():
+                n_pairs, n_kept = write_similarity_frames(
+                    frames, t, file, all_pairs=all_pairs, fmt=args.format,
+                    matches=matches, clusters=clusters)
+        except ImportError as e:
+            logging.error("%s", e)
+            return
+        if args.incremental:
+            with _PROFILER.stage("similarity_cache"):
+                save_similarity_cache(devs, t, matches, args.format if all_pairs else None,
+                                      file, args.blocking)
+    _PROFILER.count("pairs_scored", n_pairs)
+    _PROFILER.count("pairs_kept", n_kept)
+
+    if clusters is not None:
+        with _PROFILER.stage("aliases"):
+            write_aliases(clusters, file)
+
+def similarity_frames(devs, args, t, shard=None):
+    """Lazily scored pairs of the selected engine, as PairResults chunks.
+    With shard (i, N), only that slice of the pairs is scored."""
+    if args.engine == "vectorized":
+        return _PROFILER.timed(
+            iter_vectorized_results(devs, args.blocking, t, args.workers,
+                                    args.filtered_only, args.chunk_size, shard), "scoring")
+    return iter_pair_results(devs, args.blocking, t, args.chunk_size, shard,
+                             args.workers, args.filtered_only)
+
+def run_threshold_sweep(args, devs, file, all_pairs):
+    """Score once at the lowest of --thresholds and write the filtered
+    pairs of every threshold."""
+    if args.incremental or args.aliases:
+        logging.warning("--thresholds does not reuse previous similarity results "
+                        "or write aliases")
+    # Pairs kept at a higher threshold are always kept at the lowest one
+    frames = similarity_frames(devs, args, args.thresholds[0])
+    try:
+        with _PROFILER.stage("write"), _PROFILER.hot_loop():
+            n_pairs, n_kept = write_similarity_sweep(frames, args.thresholds, file,
+                                                     all_pairs, args.format)
+    except ImportError as e:
+        logging.error("%s", e)
+        return
+    _PROFILER.count("pairs_scored", n_pairs)
+    _PROFILER.count("pairs_kept", n_kept[args.thresholds[0]])
+
+def run_shard(args, devs, file, t, all_pairs):
+    """Score one shard of the pairs into its part files and manifest."""
+    if all_pairs and args.format != "csv":
+        logging.error("--shard needs --format csv or --filtered-only, "
+                      "other formats cannot be merged byte for byte")
+        return
+    if args.thresholds or args.top_k is not None or args.incremental or args.aliases:
+        logging.warning("--shard ignores --thresholds, --top-k, --incremental and --aliases")
+    prefix = shard_prefix(file, *args.shard)
+    frames = similarity_frames(devs, args, t, args.shard)
+    with _PROFILER.stage("write"), _PROFILER.hot_loop():
+        n_pairs, n_kept = write_similarity_frames(frames, t, prefix, all_pairs=all_pairs)
+    save_shard_manifest(file, args.shard, t, devs, args.blocking, all_pairs, n_pairs, n_kept)
+    _PROFILER.count("pairs_scored", n_pairs)
+    _PROFILER.count("pairs_kept", n_kept)
+
+def run_top_k(args, devs, file, t):
+    """Stream the scored pairs through per-developer heaps and write the
+    ranked candidates. Blocking and --filtered-only limit the candidates."""
+    if args.top_k < 1:
+        logging.error("--top-k must be at least 1")
+        return
+    if args.thresholds or args.incremental or args.aliases:
+        logging.warning("--top-k ignores --thresholds, --incremental and --aliases")
+    neighbors = TopKNeighbors(devs, args.top_k)
+    n_pairs = 0
+    with _PROFILER.stage("top_k"), _PROFILER.hot_loop():
+        for results in similarity_frames(devs, args, t):
+            n_pairs += len(results)
+            neighbors.add(results)
+    with _PROFILER.stage("write"):
+        n_rows = write_top_k(neighbors, file)
+    logging.info("Ranked %d pairs, kept %d candidates", n_pairs, n_rows)
+    _PROFILER.count("pairs_scored", n_pairs)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,61 @@
+"""Tests for benchmark_project1developers.py"""
+import os
+import unittest
+import benchmark_project1developers as bench
+
+class TestBenchmarkProject1Developers(unittest.TestCase):
+    """Tests for the synthetic developers and the similarity benchmark"""
+
+    def test_synthetic_developers(self):
+        """Generated developers are unique, seeded and contain planted duplicates."""
+        devs, person_ids = bench.synthetic_developers(500, seed=1)
+        self.assertEqual(len(devs), 500)
+        self.assertEqual(len(person_ids), 500)
+        self.assertEqual(len({tuple(dev) for dev in devs}), 500)
+        self.assertEqual(bench.synthetic_developers(500, seed=1), (devs, person_ids))
+        self.assertNotEqual(bench.synthetic_developers(500, seed=2)[0], devs)
+        self.assertTrue(bench.planted_pairs(person_ids))
+        self.assertTrue(any(email.endswith(bench.NOREPLY_DOMAIN) for _, email in devs))
+        self.assertTrue(any(not name.isascii() for name, _ in devs))
+        _, person_ids = bench.synthetic_developers(500, duplicate_rate=0)
+        self.assertFalse(bench.planted_pairs(person_ids))
+
+    def test_precision_recall(self):
+        """Precision and recall of found pairs against planted pairs."""
+        expected = bench.planted_pairs([0, 1, 0, 2, 0])
+        self.assertEqual(expected, {(0, 2), (0, 4), (2, 4)})
+        self.assertEqual(bench.precision_recall({(0, 2), (1, 3)}, expected), (0.5, 1 / 3))
+        self.assertEqual(bench.precision_recall(set(), set()), (1.0, 1.0))
+
+    def test_bench_similarity(self):
+        """The benchmark reports every stage and matches the planted duplicates."""
+        cwd = os.getcwd()
+        result = bench.bench_similarity(200, t=0.9)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(set(result["stages"]), set(bench.STAGES))
+        # Peak RSS is a high-water mark of the whole run, not of each stage
+        self.assertGreater(result["peak_rss_mb"], 0)
+        self.assertNotIn("peak_rss_mb", result["stages"]["scoring"])
+        self.assertEqual(result["pairs"], 200 * 199 // 2)
+        self.assertGreater(result["recall"], 0.5)
+        self.assertGreater(result["stages"]["scoring"]["pairs_per_s"], 0)
+        # Lossless blocking does not change the matches
+        self.assertEqual(bench.bench_similarity(200, t=0.9, blocking=None)["matches"],
+                         result["matches"])
+
+    def test_compare_to_baseline(self):
+        """Slower stages and any change in matching quality are regressions."""
+        result = bench.bench_similarity(100)
+        baseline = {"100": result}
+        self.assertEqual(bench.compare_to_baseline({"100": result}, baseline), [])
+        slower = {**result, "stages": {**result["stages"],
+                                       "write": {**result["stages"]["write"], "seconds": 100}}}
+        self.assertEqual(len(bench.compare_to_baseline({"100": slower}, baseline)), 1)
+        worse = {**result, "recall": result["recall"] - 0.1}
+        self.assertIn("recall", bench.compare_to_baseline({"100": worse}, baseline)[0])
+        other = {**result, "settings": {**result["settings"], "threshold": 0.5}}
+        self.assertEqual(len(bench.compare_to_baseline({"100": other}, baseline)), 1)
+        self.assertEqual(bench.compare_to_baseline({"200": result}, baseline), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,48 @@
 """Tests for project1developers.py"""
 import unittest
+import argparse
+import asyncio
 import os
 import csv
+import gzip
+import importlib.util
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from itertools import combinations
 from unittest.mock import patch, Mock
 import pandas as pd
 import project1developers as p1d
 
+# Small developer list with a mix of duplicates and unrelated developers
+SAMPLE_DEVS = [
+    ["Erkki Esimerkki", "erkki.esimerkki@yritys.fi"],
+    ["Erkki Esimerkki", "eesimerkki@firma.com"],
+    ["E. Esimerkki", "erkki.esimerkki@yritys.fi"],
+    ["erkki", "erkki@esimerkki.com"],
+    ["Maija Meikäläinen", "maija@meikalainen.com"],
+    ["Maija Meikalainen", "mmeikalainen@users.noreply.github.com"],
+    ["Tiina Tossavainen", "tiinat@yritys.fi"],
+    ["Väinö Vaka Väinämöinen", "vaka@vainamoinen.com"],
+    ["vaka", "vaka@kalevala.fi"],
+    ["", "anon@example.com"],
+    ["", "anon2@example.com"],
+    ["Pentti", "pentti.virtanen@osoite.fi"],
+    ["Pentti Virtanen", "pv@osoite.fi"],
+]
+
+def create_git_repo(path, commits):
+    """Create a git repository at path with commits given as
+    (author name, author email, committer name, committer email)."""
+    subprocess.run(["git", "init", "--quiet", path], check=True)
+    for k, (a_name, a_email, c_name, c_email) in enumerate(commits):
+        env = dict(os.environ, GIT_AUTHOR_NAME=a_name, GIT_AUTHOR_EMAIL=a_email,
+                   GIT_COMMITTER_NAME=c_name, GIT_COMMITTER_EMAIL=c_email)
+        subprocess.run(["git", "-C", path, "commit", "--quiet", "--allow-empty",
+                        "-m", f"commit {k}"], check=True, env=env)
+
 class TestTestProject1Developers(unittest.TestCase):
     """Test suite for the project1developers module.
     This class contains unit tests for the project1developers module"""
@@ -68,6 +105,148 @@ class TestTestProject1Developers(unittest.TestCase):
         mock_logging.error.assert_called()
         self.assertEqual(result, [])
 
+    @unittest.skipUnless(shutil.which("git"), "git not installed")
+    def test_get_developers_git_backend(self):
+        """The git log backend returns the same developers as PyDriller."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            create_git_repo(tmp_dir, [
+                ("Maija", "maija@meikalainen.com", "Erkki Esimerkki", "erkki@kuukkel.com"),
+                ("Väinö Väinämöinen", "vaka@kalevala.fi", "Maija", "maija@meikalainen.com"),
+                ("Maija", "maija@meikalainen.com", "Maija", "maija@meikalainen.com"),
+            ])
+            result = p1d.get_developers_from_repo(tmp_dir, backend="git")
+            self.assertEqual(result, p1d.get_developers_from_repo(tmp_dir, backend="pydriller"))
+        self.assertEqual(result, [
+            ("Erkki Esimerkki", "erkki@kuukkel.com"),
+            ("Maija", "maija@meikalainen.com"),
+            ("Väinö Väinämöinen", "vaka@kalevala.fi"),
+        ])
+
+    @patch("project1developers.Repository")
+    def test_get_developers_git_backend_fallback(self, mock_repo_class):
+        """If git log fails, PyDriller is used instead."""
+        commit = Mock()
+        commit.author.name = commit.committer.name = "Maija"
+        commit.author.email = commit.committer.email = "maija@meikalainen.com"
+        mock_repo_class.return_value.traverse_commits.return_value = [commit]
+
+        result = p1d.get_developers_from_repo("/does/not/exist", backend="git")
+        self.assertEqual(result, [("Maija", "maija@meikalainen.com")])
+        with self.assertRaises(ValueError):
+            p1d.get_developers_from_repo("/does/not/exist", backend="svn")
+
+    @unittest.skipUnless(shutil.which("git"), "git not installed")
+    def test_load_developers_incremental(self):
+        """Incremental mining walks only new commits and keeps known identities."""
+        outputfile = "test_incremental"
+        if os.path.exists(p1d.watermark_path(outputfile)):
+            os.remove(p1d.watermark_path(outputfile))
+        maija = ("Maija", "maija@meikalainen.com")
+        erkki = ("Erkki Esimerkki", "erkki@kuukkel.com")
+        tiina = ("Tiina Tossavainen", "tiinat@yritys.fi")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            create_git_repo(tmp_dir, [maija + erkki, maija + maija])
+            p1d.load_developers_from_repo(tmp_dir, outputfile, incremental=True)
+            self.assertEqual(p1d.read_developers(outputfile), [list(erkki), list(maija)])
+
+            create_git_repo(tmp_dir, [tiina + maija])
+            with patch("project1developers.iter_git_log_identities",
+                       wraps=p1d.iter_git_log_identities) as spy:
+                p1d.load_developers_from_repo(tmp_dir, outputfile, incremental=True)
+            # Only the range after the watermark commit is walked
+            self.assertIn("..", spy.call_args[0][1])
+            self.assertEqual(p1d.read_developers(outputfile),
+                             [list(erkki), list(maija), list(tiina)])
+            watermark = p1d.load_watermark(outputfile)
+            head = subprocess.run(["git", "-C", tmp_dir, "rev-parse", "HEAD"],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+            self.assertEqual(watermark["repo"], tmp_dir)
+            self.assertEqual(list(watermark["branches"].values()), [head])
+            self.assertEqual(len(watermark["identities"]), 3)
+
+    @unittest.skipUnless(shutil.which("git"), "git not installed")
+    def test_load_developers_from_repos(self):
+        """Repositories are pooled with their repos, a failing one does not stop the others."""
+        maija = ("Maija", "maija@meikalainen.com")
+        erkki = ("Erkki Esimerkki", "erkki@kuukkel.com")
+        tiina = ("Tiina Tossavainen", "tiinat@yritys.fi")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo_a, repo_b = os.path.join(tmp_dir, "a"), os.path.join(tmp_dir, "b")
+            missing = os.path.join(tmp_dir, "missing")
+            create_git_repo(repo_a, [maija + erkki])
+            create_git_repo(repo_b, [tiina + maija])
+            manifest = os.path.join(tmp_dir, "repos.txt")
+            with open(manifest, "w", encoding="utf-8") as f:
+                f.write(f"# organization\n{repo_b}\n\n{missing}\n")
+            repos = [repo_a] + p1d.read_repo_manifest(manifest)
+            self.assertEqual(repos, [repo_a, repo_b, missing])
+
+            rows, results = p1d.mine_repositories(repos, workers=2)
+            self.assertEqual(rows, [list(erkki) + [repo_a], list(maija) + [f"{repo_a};{repo_b}"],
+                                    list(tiina) + [repo_b]])
+            self.assertEqual(list(results), repos)
+            self.assertEqual(results[repo_a][0], 2)
+            self.assertIsNone(results[repo_a][2])
+            self.assertIsNotNone(results[missing][2])
+
+            p1d.fetch_or_read_developers("test_pool", repos, {"workers": 2})
+            # The pooled CSV keeps the repos, read_developers returns name and email
+            with open(os.path.join("project1devs", "test_pool.csv"), encoding="utf-8") as f:
+                self.assertEqual(next(csv.reader(f)), ["name", "email", "repos"])
+            self.assertEqual(p1d.read_developers("test_pool"),
+                             [list(erkki), list(maija), list(tiina)])
+            with self.assertRaises(ValueError):
+                p1d.load_developers_from_repos([missing], "test_pool_missing")
+
+    @unittest.skipUnless(shutil.which("git"), "git not installed")
+    def test_clone_cache(self):
+        """Cached clones hold commits only, are fetched on reuse and evicted LRU."""
+        maija = ("Maija", "maija@meikalainen.com")
+        tiina = ("Tiina Tossavainen", "tiinat@yritys.fi")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo_a, repo_b = os.path.join(tmp_dir, "a"), os.path.join(tmp_dir, "b")
+            create_git_repo(repo_a, [maija * 2])
+            create_git_repo(repo_b, [tiina * 2])
+            for repo in (repo_a, repo_b):
+                # Allow partial clones over file://
+                subprocess.run(["git", "-C", repo, "config", "uploadpack.allowFilter", "true"],
+                               check=True)
+            url_a, url_b = f"file://{repo_a}", f"file://{repo_b}"
+            cache = p1d.CloneCache(os.path.join(tmp_dir, "cache"))
+            self.assertEqual(p1d.get_developers_from_repo(url_a, clone_cache=cache), [maija])
+            path_a = cache.clone_path(url_a)
+            objects = subprocess.run(["git", "-C", path_a, "cat-file", "--batch-all-objects",
+                                      "--batch-check=%(objecttype)"],
+                                     capture_output=True, text=True, check=True).stdout.split()
+            self.assertEqual(objects, ["commit"])
+
+            create_git_repo(repo_a, [tiina * 2])
+            with patch("project1developers.clone_repo", wraps=p1d.clone_repo) as clone, \
+                 patch("project1developers.fetch_repo", wraps=p1d.fetch_repo) as fetch:
+                devs, _ = p1d.get_developers_incremental(url_a, clone_cache=cache)
+            self.assertEqual(devs, [maija, tiina])
+            clone.assert_not_called()
+            fetch.assert_called_once_with(path_a)
+
+            p1d.mine_repositories([url_b], clone_cache=cache)
+            index = cache._load_index()
+            cache.max_bytes = index[os.path.basename(cache.clone_path(url_b))]["bytes"]
+            self.assertEqual(cache.evict(), [url_a])
+            self.assertFalse(os.path.exists(path_a))
+            self.assertTrue(os.path.isdir(cache.clone_path(url_b)))
+
+    @unittest.skipUnless(shutil.which("git"), "git not installed")
+    def test_get_developers_incremental_rewritten_history(self):
+        """A watermark commit missing from the history triggers a full walk."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            create_git_repo(tmp_dir, [("Maija", "maija@meikalainen.com") * 2])
+            devs, watermark = p1d.get_developers_incremental(tmp_dir)
+            branch = next(iter(watermark["branches"]))
+            watermark["branches"][branch] = "0" * 40
+            watermark["identities"].append(["Old Identity", "old@example.com"])
+            devs_again, _ = p1d.get_developers_incremental(tmp_dir, watermark)
+        self.assertEqual(devs_again, devs)
+
     def test_project_folder_exists(self):
         """Check that project1devs directory exists."""
         self.assertTrue(os.path.isdir("project1devs"))
@@ -105,6 +284,57 @@ class TestTestProject1Developers(unittest.TestCase):
 
         self.assertEqual(result, [["Erkki Esimerkki", "erkki@esimerkki.com"]])
 
+    def test_lazy_imports(self):
+        """pandas and PyDriller are only imported when first used."""
+        code = ("import sys, project1developers as p1d; "
+                "print('pandas' in sys.modules, 'pydriller' in sys.modules); "
+                "p1d.create_similarity_dataframe([]); print('pandas' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(p1d.__file__)))
+        self.assertEqual(result.stdout.split(), ["False", "False", "True"])
+
+    def test_read_developers_snapshot(self):
+        """The snapshot holds the processed developers and is only used while the CSV is unchanged."""
+        outputfile = "test_snapshot"
+        if os.path.exists(p1d.snapshot_path(outputfile)):
+            os.remove(p1d.snapshot_path(outputfile))
+        p1d.save_developers_to_csv(SAMPLE_DEVS, outputfile)
+        devs = p1d.read_developers_snapshot(outputfile)
+        self.assertTrue(os.path.exists(p1d.snapshot_path(outputfile)))
+        expected = p1d.DeveloperFeatures(SAMPLE_DEVS)
+        with patch("project1developers.read_developers") as mock_read:
+            snapshot_devs = p1d.read_developers_snapshot(outputfile)
+            # A CSV with a new mtime but the same content is recognized by its hash
+            stat = os.stat(os.path.join("project1devs", f"{outputfile}.csv"))
+            os.utime(os.path.join("project1devs", f"{outputfile}.csv"),
+                     ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual(p1d.read_developers_snapshot(outputfile), SAMPLE_DEVS)
+        mock_read.assert_not_called()
+        self.assertEqual(devs, SAMPLE_DEVS)
+        self.assertEqual(snapshot_devs, SAMPLE_DEVS)
+        features = p1d.preprocess_developers(snapshot_devs)
+        for field in p1d.DeveloperFeatures.__slots__:
+            self.assertEqual(getattr(features, field), getattr(expected, field))
+
+        p1d.save_developers_to_csv(SAMPLE_DEVS[:3], outputfile)
+        self.assertIsNone(p1d.load_snapshot(outputfile))
+        self.assertEqual(p1d.read_developers_snapshot(outputfile), SAMPLE_DEVS[:3])
+        p1d.save_developers_to_csv([], outputfile)
+        p1d.read_developers_snapshot(outputfile)
+        self.assertEqual(len(p1d.load_snapshot(outputfile)), 0)
+
+        # A corrupt snapshot is treated as stale and rebuilt from the CSV
+        p1d.save_developers_to_csv(SAMPLE_DEVS, outputfile)
+        p1d.read_developers_snapshot(outputfile)
+        with open(p1d.snapshot_path(outputfile), "rb") as f:
+            data = f.read()
+        for corrupt in (b"", data[:10], data[:30], data[:-5], data + b"x",
+                        data.replace(b'"n": %d' % len(SAMPLE_DEVS), b'"n": 99')):
+            with open(p1d.snapshot_path(outputfile), "wb") as f:
+                f.write(corrupt)
+            self.assertIsNone(p1d.load_snapshot(outputfile))
+            self.assertEqual(p1d.read_developers_snapshot(outputfile), SAMPLE_DEVS)
+
     def test_process(self):
         """Test that process() correctly extracts name, initials, and email prefix."""
         dev = ["Êrkkä ASImèrkki", "erkka.esimerkki@yritys.com"]
@@ -156,6 +386,30 @@ class TestTestProject1Developers(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
+    def test_process_ascii_fast_path(self):
+        """ASCII names give the same result as the full Unicode normalization."""
+        dev = ["Dr. JOHN o'Brien-Smith ", "John.OBrien@Example.com"]
+        result = p1d.process(dev)
+        self.assertEqual(result[:3], ("dr john obriensmith", "dr", "john obriensmith"))
+        self.assertEqual(result[6], "John.OBrien")
+
+    def test_developer_features(self):
+        """DeveloperFeatures holds the process() output of each developer."""
+        features = p1d.preprocess_developers(SAMPLE_DEVS)
+        self.assertEqual(len(features), len(SAMPLE_DEVS))
+        for i, dev in enumerate(SAMPLE_DEVS):
+            self.assertEqual(features.processed(i), p1d.process(dev))
+            self.assertEqual(features.raw_names[i], dev[0])
+        # An existing table is not processed again
+        self.assertIs(p1d.preprocess_developers(features), features)
+
+    def test_score_pair_matches_compute_pair_similarity(self):
+        """Index-based scoring gives the same row as compute_pair_similarity."""
+        features = p1d.preprocess_developers(SAMPLE_DEVS)
+        for i, j in [(0, 1), (0, 2), (4, 5), (7, 8), (9, 10), (11, 12)]:
+            self.assertEqual(p1d.score_pair(features, i, j),
+                             p1d.compute_pair_similarity(SAMPLE_DEVS[i], SAMPLE_DEVS[j]))
+
     def test_compute_similarity(self):
         """Test that compute_similarity returns a list for two developers."""
         devs = [
@@ -202,6 +456,188 @@ class TestTestProject1Developers(unittest.TestCase):
         self.assertIsInstance(pair[10], bool) # c6
         self.assertIsInstance(pair[11], bool) # c7
 
+    def test_candidate_pairs_lossless(self):
+        """Lossless blocking keeps exactly the filtered pairs of a full run."""
+        full = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        for t in (0.0, 0.5, 0.7, 0.9, 1.0, 1.5):
+            expected = p1d.filter_similarity(full.copy(), t)
+            blocked = p1d.create_similarity_dataframe(
+                p1d.compute_similarity(SAMPLE_DEVS, blocking="lossless", t=t))
+            result = p1d.filter_similarity(blocked, t)
+            pd.testing.assert_frame_equal(result.reset_index(drop=True),
+                                          expected.reset_index(drop=True))
+
+    def test_candidate_pairs_lossless_fallback(self):
+        """Lossless blocking returns compact pairs, or None (all pairs) if it prunes too little."""
+        pairs = p1d.candidate_pairs(SAMPLE_DEVS, "lossless", 0.9)
+        self.assertIsInstance(pairs, p1d.PairList)
+        self.assertEqual(pairs[1:3], list(pairs)[1:3])
+        i, j = pairs.index_arrays()
+        self.assertEqual(list(zip(i.tolist(), j.tolist())), list(pairs))
+        for t in (0.0, 0.9):
+            with patch.object(p1d, "LOSSLESS_CHECK_PAIRS", 0), \
+                    patch.object(p1d, "LOSSLESS_MAX_FRACTION", 0.0):
+                self.assertIsNone(p1d.candidate_pairs(SAMPLE_DEVS, "lossless", t))
+
+    def test_candidate_pairs_prunes(self):
+        """Blocking returns sorted index pairs and prunes unrelated pairs."""
+        total = len(SAMPLE_DEVS) * (len(SAMPLE_DEVS) - 1) // 2
+        for mode in p1d.BLOCKING_MODES:
+            pairs = p1d.candidate_pairs(SAMPLE_DEVS, mode, 0.9)
+            self.assertEqual(pairs, sorted(pairs))
+            self.assertTrue(all(i < j for i, j in pairs))
+            self.assertLess(len(pairs), total)
+            # Identical emails are always candidates
+            self.assertIn((0, 2), pairs)
+
+    def test_same_email_pairs(self):
+        """Email hash join finds all same-email pairs and identity groups."""
+        self.assertEqual(p1d.same_email_pairs(SAMPLE_DEVS), [(0, 2)])
+        self.assertEqual(p1d.email_groups(SAMPLE_DEVS), [[0, 2]])
+        # Email prefixes: erkki.esimerkki (0, 2) and vaka (7, 8)
+        self.assertEqual(p1d.email_groups(SAMPLE_DEVS, by_prefix=True), [[0, 2], [7, 8]])
+        ids = p1d.email_identity_ids(SAMPLE_DEVS)
+        self.assertEqual(ids[2], 0)
+        self.assertEqual(ids[:2], [0, 1])
+        devs = [["A", "a@x.com"], ["B", " A@X.com"]]
+        # Emails are compared exactly
+        self.assertEqual(p1d.email_groups(devs), [])
+
+    def test_candidate_pairs_email(self):
+        """Email blocking keeps all same-email duplicates of a full run."""
+        full = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        expected = p1d.filter_similarity(full, 0.7)
+        expected = expected[expected["email_1"] == expected["email_2"]]
+        result = p1d.filter_similarity(p1d.create_similarity_dataframe(
+            p1d.compute_similarity(SAMPLE_DEVS, blocking="email", t=0.7)), 0.7)
+        result = result[result["email_1"] == result["email_2"]]
+        pd.testing.assert_frame_equal(result.reset_index(drop=True),
+                                      expected.reset_index(drop=True))
+        self.assertEqual(p1d.candidate_pairs(SAMPLE_DEVS, "email"), [(0, 2), (7, 8)])
+
+    def test_candidate_pairs_unknown_mode(self):
+        """Unknown blocking mode raises ValueError."""
+        with self.assertRaises(ValueError):
+            p1d.candidate_pairs(SAMPLE_DEVS, "nope")
+
+    def test_compute_similarity_filtered_only(self):
+        """Threshold-aware scoring returns exactly the rows kept by filter_similarity."""
+        full = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        for t in (0.0, 0.5, 0.7, 0.9, 1.0):
+            expected = p1d.filter_similarity(full.copy(), t)
+            result = p1d.compute_similarity(SAMPLE_DEVS, t=t, filtered_only=True)
+            self.assertEqual(result, expected.iloc[:, :12].values.tolist())
+            self.assertEqual(p1d.compute_similarity(SAMPLE_DEVS, t=t, workers=2,
+                                                    filtered_only=True), result)
+
+    def test_score_pair_filtered(self):
+        """score_pair_filtered returns the full row or None."""
+        features = p1d.preprocess_developers(SAMPLE_DEVS)
+        self.assertEqual(p1d.score_pair_filtered(features, 0, 2, 0.9),
+                         p1d.score_pair(features, 0, 2))
+        self.assertIsNone(p1d.score_pair_filtered(features, 0, 6, 0.9))
+        self.assertEqual(list(p1d.score_row_filtered(features, 0, (), 0.9)), [])
+
+    def test_score_pair_filtered_boundary(self):
+        """A ratio of exactly t passes, like in filter_similarity."""
+        features = p1d.preprocess_developers([["Simon Shields", "keepcalm444@gmail.com"],
+                                              ["Simon Sehier", "simon.sehier@example.com"]])
+        self.assertEqual(p1d.score_pair(features, 0, 1)[4], 0.8)
+        self.assertEqual(p1d.score_pair_filtered(features, 0, 1, 0.8),
+                         p1d.score_pair(features, 0, 1))
+
+    def test_iter_similarity_frames(self):
+        """The vectorized engine gives the same columns as the Python engine."""
+        expected = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        result = pd.concat(p1d.iter_similarity_frames(SAMPLE_DEVS, chunk_size=10),
+                           ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+        filtered = p1d.filter_similarity(expected, 0.7).iloc[:, :12].reset_index(drop=True)
+        for blocking in (None, "lossless"):
+            result = pd.concat(p1d.iter_similarity_frames(SAMPLE_DEVS, blocking, 0.7,
+                                                          filtered_only=True, chunk_size=7),
+                               ignore_index=True)
+            pd.testing.assert_frame_equal(result, filtered)
+
+    def test_distinct_ratios(self):
+        """Memoized ratios of repeated values equal the plain ratios."""
+        devs = [(f"{first} {last}", f"{first}.{last}@example.com".lower())
+                for first in ("Anna", "Ann", "Erik", "Eero") for last in ("Virtanen", "Virta")]
+        arrays = p1d.feature_arrays(p1d.preprocess_developers(devs))
+        memo = p1d.distinct_ratios(arrays, "lasts")
+        self.assertEqual(len(memo), 2)
+        self.assertIsNone(p1d.distinct_ratios(arrays, "names"))
+
+        i, j = p1d.pair_index_arrays(len(devs), 0, 28)
+        expected = p1d.cpdist(arrays["lasts"][i], arrays["lasts"][j],
+                              scorer=p1d.Indel.normalized_similarity, dtype=p1d.np.float64)
+        p1d.np.testing.assert_array_equal(memo.ratios(i, j), expected)
+        p1d.np.testing.assert_array_equal(memo.ratios(i, j), expected)
+        self.assertEqual((memo.lookups, memo.computed), (56, 3))
+        self.assertAlmostEqual(memo.hit_rate(), 1 - 3 / 56)
+
+        expected = pd.concat(p1d.iter_similarity_frames(devs, chunk_size=28), ignore_index=True)
+        pd.testing.assert_frame_equal(
+            expected, p1d.create_similarity_dataframe(p1d.compute_similarity(devs)))
+
+    def test_pair_results(self):
+        """Array-backed results hold the same values as score_pair rows."""
+        expected = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        chunks = list(p1d.iter_pair_results(SAMPLE_DEVS, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10] * 7 + [8])
+        self.assertEqual(chunks[0].i.dtype, p1d.np.int32)
+        self.assertEqual(chunks[0].flags.dtype, p1d.np.uint8)
+        result = pd.concat([chunk.to_dataframe() for chunk in chunks], ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+        # filter_similarity runs on the arrays and keeps the same pairs
+        features = p1d.preprocess_developers(SAMPLE_DEVS)
+        results = p1d.score_pair_results(features, p1d.combinations(range(len(features)), 2))
+        for t in (0.5, 0.7, 0.9):
+            filtered = p1d.filter_similarity(results, t)
+            self.assertIsInstance(filtered, p1d.PairResults)
+            pd.testing.assert_frame_equal(
+                filtered.to_dataframe(),
+                p1d.filter_similarity(expected.copy(), t).iloc[:, :12].reset_index(drop=True))
+        self.assertEqual(len(p1d.score_pair_results(features, [])), 0)
+
+        # Pool tasks return the arrays, threshold-aware with filtered_only
+        parallel = list(p1d.iter_pair_results(SAMPLE_DEVS, chunk_size=10, workers=2))
+        self.assertEqual([len(chunk) for chunk in parallel], [10] * 7 + [8])
+        pd.testing.assert_frame_equal(
+            pd.concat([chunk.to_dataframe() for chunk in parallel], ignore_index=True), expected)
+        self.assertEqual([row for chunk in parallel for row in chunk.rows()],
+                         p1d.compute_similarity(SAMPLE_DEVS))
+        for workers in (1, 2):
+            filtered = list(p1d.iter_pair_results(SAMPLE_DEVS, t=0.7, workers=workers,
+                                                  filtered_only=True))
+            self.assertEqual([row for chunk in filtered for row in chunk.rows()],
+                             p1d.compute_similarity(SAMPLE_DEVS, filtered_only=True))
+
+    def test_pair_index_arrays(self):
+        """Vectorized pair indices follow the combinations() order."""
+        pairs = list(p1d.combinations(range(6), 2))
+        i, j = p1d.pair_index_arrays(6, 2, 12)
+        self.assertEqual(list(zip(i.tolist(), j.tolist())), pairs[2:12])
+
+    def test_pair_index_helpers(self):
+        """Pair-index ranges reproduce the combinations() order."""
+        n = 7
+        pairs = list(p1d.combinations(range(n), 2))
+        for k, pair in enumerate(pairs):
+            self.assertEqual(p1d.pair_from_index(n, k), pair)
+        for start, end in [(0, len(pairs)), (3, 11), (5, 6), (8, 8), (19, len(pairs))]:
+            self.assertEqual(list(p1d.iter_pair_range(n, start, end)), pairs[start:end])
+
+    def test_compute_similarity_parallel(self):
+        """Parallel scoring gives output identical to serial scoring."""
+        serial = p1d.compute_similarity(SAMPLE_DEVS)
+        self.assertEqual(p1d.compute_similarity(SAMPLE_DEVS, workers=3), serial)
+        blocked = p1d.compute_similarity(SAMPLE_DEVS, blocking="lossless", t=0.7)
+        self.assertEqual(p1d.compute_similarity(SAMPLE_DEVS, blocking="lossless",
+                                                t=0.7, workers=2), blocked)
+
     def test_filter_similarity(self):
         """Test filter_similarity keeps rows meeting threshold conditions."""
         testdata = {
@@ -250,6 +686,399 @@ class TestTestProject1Developers(unittest.TestCase):
         p1d.save_similarity_df(df, t=0.7, outputfile="test")
         self.assertTrue(os.path.exists("project1devs/test_similarity_t=0.7.csv"))
 
+    def test_stream_similarity(self):
+        """Streaming in small chunks writes the same files as the DataFrame functions."""
+        df = p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS))
+        p1d.save_all_pairs(df.copy(), "test_ref")
+        p1d.save_similarity_df(p1d.filter_similarity(df, 0.7), 0.7, "test_ref")
+
+        n_pairs, n_kept = p1d.stream_similarity(p1d.iter_similarity(SAMPLE_DEVS), 0.7,
+                                                "test_stream", chunk_size=5)
+        self.assertEqual(n_pairs, len(df))
+        for suffix in ("_similarity.csv", "_similarity_t=0.7.csv"):
+            with open(os.path.join("project1devs", "test_ref" + suffix), "rb") as f:
+                expected = f.read()
+            with open(os.path.join("project1devs", "test_stream" + suffix), "rb") as f:
+                self.assertEqual(f.read(), expected)
+        self.assertEqual(n_kept, expected.count(b"\n") - 1)
+
+    def test_stream_similarity_gzip_without_pairs(self):
+        """Compressed output and empty input still write the headers."""
+        p1d.stream_similarity(iter([]), 0.7, "test_stream_gz", fmt="csv.gz")
+        with gzip.open(os.path.join("project1devs", "test_stream_gz_similarity.csv.gz"),
+                       "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), [",".join(p1d.create_similarity_dataframe([]))])
+        with self.assertRaises(ValueError):
+            p1d.stream_similarity(iter([]), 0.7, "test_stream_gz", fmt="xlsx")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_stream_similarity_parquet(self):
+        """Parquet output holds all pairs."""
+        rows = p1d.compute_similarity(SAMPLE_DEVS)
+        p1d.stream_similarity(iter(rows), 0.7, "test_stream_pq", fmt="parquet", chunk_size=4)
+        df = pd.read_parquet(os.path.join("project1devs", "test_stream_pq_similarity.parquet"))
+        pd.testing.assert_frame_equal(df, p1d.create_similarity_dataframe(rows))
+
+    def test_update_similarity(self):
+        """Incremental update gives the same filtered output as a full run."""
+        old_devs = SAMPLE_DEVS[:5] + SAMPLE_DEVS[7:]
+        matches = []
+        p1d.stream_similarity(p1d.iter_similarity(old_devs), 0.7, "test_update",
+                              matches=matches)
+        p1d.save_similarity_cache(old_devs, 0.7, matches, "csv", "test_update")
+
+        result = p1d.update_similarity(SAMPLE_DEVS, 0.7, "test_update")
+        n = len(SAMPLE_DEVS)
+        self.assertEqual(result[0], n * (n - 1) // 2 - len(old_devs) * (len(old_devs) - 1) // 2)
+
+        p1d.stream_similarity(p1d.iter_similarity(SAMPLE_DEVS), 0.7, "test_update_full")
+        with open(os.path.join("project1devs", "test_update_full_similarity_t=0.7.csv"),
+                  "rb") as f:
+            expected = f.read()
+        with open(os.path.join("project1devs", "test_update_similarity_t=0.7.csv"), "rb") as f:
+            self.assertEqual(f.read(), expected)
+        # New pairs are appended to the all-pairs file
+        all_pairs = pd.read_csv(os.path.join("project1devs", "test_update_similarity.csv"))
+        self.assertEqual(len(all_pairs), n * (n - 1) // 2)
+
+        # The cache is only used while the all-pairs file holds the cached pairs
+        devs = SAMPLE_DEVS + [["Uusi Kehittäjä", "uusi@example.com"]]
+        self.assertEqual(p1d.update_similarity(devs, 0.7, "test_update")[0], n)
+        p1d.stream_similarity(p1d.iter_similarity(old_devs), 0.7, "test_update")
+        self.assertIsNone(p1d.update_similarity(devs + [["Toinen", "toinen@example.com"]],
+                                                0.7, "test_update"))
+
+    def test_update_similarity_invalid_cache(self):
+        """Cache is not used if the threshold, version or developers changed."""
+        p1d.save_similarity_cache(SAMPLE_DEVS[:4], 0.7, [], None, "test_update_invalid")
+        self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS, 0.9, "test_update_invalid",
+                                                all_pairs=False))
+        self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS[1:], 0.7, "test_update_invalid",
+                                                all_pairs=False))
+        self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS[3::-1], 0.7, "test_update_invalid",
+                                                all_pairs=False))
+        # No all-pairs file was written in the cached run
+        self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS, 0.7, "test_update_invalid"))
+        with patch("project1developers.HEURISTIC_VERSION", -1):
+            self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS, 0.7, "test_update_invalid",
+                                                    all_pairs=False))
+        self.assertIsNotNone(p1d.update_similarity(SAMPLE_DEVS, 0.7, "test_update_invalid",
+                                                   all_pairs=False))
+
+    def test_update_similarity_blocking(self):
+        """The cache is tied to the blocking mode and approximate modes are not cached."""
+        outputfile = "test_update_blocking"
+        old_devs = SAMPLE_DEVS[:5] + SAMPLE_DEVS[7:]
+        matches = p1d.compute_similarity(old_devs, "lossless", 0.7, filtered_only=True)
+        p1d.save_similarity_cache(old_devs, 0.7, matches, None, outputfile, "lossless")
+        for blocking in (None, "keys"):
+            self.assertIsNone(p1d.update_similarity(SAMPLE_DEVS, 0.7, outputfile,
+                                                    all_pairs=False, blocking=blocking))
+        result = p1d.update_similarity(SAMPLE_DEVS, 0.7, outputfile, all_pairs=False,
+                                       blocking="lossless")
+        n = len(SAMPLE_DEVS)
+        self.assertLess(result[0], n * (n - 1) // 2 - len(old_devs) * (len(old_devs) - 1) // 2)
+        expected = p1d.compute_similarity(SAMPLE_DEVS, t=0.7, filtered_only=True)
+        self.assertEqual(p1d.load_similarity_cache(outputfile)["matches"],
+                         json.loads(json.dumps(expected)))
+
+        for blocking in ("keys", "email", p1d.MinHashLSH()):
+            p1d.save_similarity_cache(SAMPLE_DEVS, 0.7, [], None, outputfile, blocking)
+            self.assertIsNone(p1d.load_similarity_cache(outputfile))
+
+    def test_parse_thresholds(self):
+        """Thresholds are parsed, sorted and deduplicated."""
+        self.assertEqual(p1d.parse_thresholds("0.9,0.7, 0.95,0.9"), [0.7, 0.9, 0.95])
+        for text in ("", "0.7,high"):
+            with self.assertRaises(p1d.argparse.ArgumentTypeError):
+                p1d.parse_thresholds(text)
+
+    def test_write_similarity_sweep(self):
+        """One scoring pass gives the same filtered files as one run per threshold."""
+        thresholds = [0.5, 0.7, 0.8, 0.9]
+        expected = {}
+        for t in thresholds:
+            p1d.stream_similarity(p1d.iter_similarity(SAMPLE_DEVS), t, "test_sweep_single",
+                                  all_pairs=False)
+            with open(os.path.join("project1devs", f"test_sweep_single_similarity_t={t}.csv"),
+                      "rb") as f:
+                expected[t] = f.read()
+
+        for frames in (p1d.iter_pair_results(SAMPLE_DEVS, chunk_size=20),
+                       p1d._row_chunks(p1d.iter_similarity(SAMPLE_DEVS, "lossless", 0.5,
+                                                           filtered_only=True), 5)):
+            n_pairs, n_kept = p1d.write_similarity_sweep(frames, thresholds[::-1], "test_sweep",
+                                                         all_pairs=False)
+            for t in thresholds:
+                with open(os.path.join("project1devs", f"test_sweep_similarity_t={t}.csv"),
+                          "rb") as f:
+                    self.assertEqual(f.read(), expected[t])
+            summary = pd.read_csv(os.path.join("project1devs", "test_sweep_thresholds.csv"))
+            self.assertEqual(list(summary["threshold"]), thresholds)
+            self.assertEqual(list(summary["pairs_kept"]), [n_kept[t] for t in thresholds])
+        self.assertEqual(n_pairs, n_kept[0.5])
+
+    def test_top_k_neighbors(self):
+        """Bounded heaps keep the k best candidates of a full ranking, from any chunking."""
+        k = 2
+        devs = [tuple(dev) for dev in SAMPLE_DEVS]
+        features = p1d.preprocess_developers(devs)
+        results = p1d.score_pair_results(features, combinations(range(len(devs)), 2))
+        same_email = results.arrays["email_ids"][results.i] == results.arrays["email_ids"][results.j]
+        scores = p1d.bird_scores(results.scores, results.flags, same_email)
+        candidates = [[] for _ in devs]
+        for score, i, j in zip(scores.tolist(), results.i.tolist(), results.j.tolist()):
+            candidates[i].append((-score, j))
+            candidates[j].append((-score, i))
+        expected = [[(b, -score) for score, b in sorted(c)[:k]] for c in candidates]
+
+        for frames in (p1d.iter_pair_results(devs, chunk_size=7),
+                       p1d.iter_pair_results(devs, chunk_size=5, workers=2),
+                       p1d.iter_vectorized_results(devs, chunk_size=5)):
+            neighbors = p1d.TopKNeighbors(devs, k)
+            for frame in frames:
+                neighbors.add(frame)
+            self.assertTrue(all(len(heap) <= k for heap in neighbors.heaps))
+            self.assertEqual([[(b, score) for b, score, *_ in neighbors.neighbors(a)]
+                              for a in range(len(devs))], expected)
+        # Identical emails are duplicates at any threshold and rank first
+        self.assertEqual(neighbors.neighbors(0)[0][:3], (2, 1.0, 1.0))
+
+        self.assertEqual(p1d.write_top_k(neighbors, "test_top_k"), len(devs) * k)
+        df = pd.read_csv(os.path.join("project1devs", "test_top_k_top_k=2.csv"),
+                         keep_default_na=False)
+        self.assertEqual(list(df.columns[:7]), ["name_1", "email_1", "rank", "name_2",
+                                                "email_2", "score", "max_threshold"])
+        self.assertEqual(df["rank"].tolist()[:2], [1, 2])
+        with self.assertRaises(ValueError):
+            p1d.TopKNeighbors(devs, 0)
+
+        # Duplicate rows are told apart by their indices
+        p1d.save_developers_to_csv([["Anna", "anna@x.com"], ["Anna", "anna@x.com"],
+                                    ["Bob", "bob@y.org"]], "test_top_k_dups")
+        path = os.path.join("project1devs", "test_top_k_dups_top_k=2.csv")
+        for options in ([], ["-w", "2"], ["-e", "vectorized"]):
+            with patch("sys.argv", ["project1developers.py", "-f", "test_top_k_dups",
+                                    "--top-k", "2", *options]):
+                p1d.main()
+            df = pd.read_csv(path, keep_default_na=False)
+            self.assertEqual(len(df), 6)
+            self.assertEqual(df["name_2"].tolist(), ["Anna", "Bob"] * 2 + ["Anna"] * 2)
+            self.assertEqual(df["score"].tolist()[:2], [1.0, 0.0])
+
+    def test_minhash_blocking(self):
+        """MinHash LSH finds similar developers and identical emails, deterministically."""
+        pairs = p1d.candidate_pairs(SAMPLE_DEVS, "minhash")
+        self.assertEqual(pairs, p1d.candidate_pairs(SAMPLE_DEVS, p1d.MinHashLSH()))
+        # Identical names, identical emails
+        self.assertIn((0, 1), pairs)
+        self.assertIn((0, 2), pairs)
+        self.assertEqual(p1d.MinHashLSH().shingles(""), set())
+
+        # Candidates are scored exactly, only pairs of the full result are kept
+        full = p1d.filter_similarity(
+            p1d.create_similarity_dataframe(p1d.compute_similarity(SAMPLE_DEVS)), 0.7)
+        lsh = p1d.MinHashLSH(bands=8, rows=2)
+        result = p1d.filter_similarity(p1d.create_similarity_dataframe(
+            p1d.compute_similarity(SAMPLE_DEVS, blocking=lsh, t=0.7)), 0.7)
+        keys = ["name_1", "email_1", "name_2", "email_2"]
+        self.assertTrue(set(map(tuple, result[keys].values))
+                        <= set(map(tuple, full[keys].values)))
+        recall, n_exact = p1d.candidate_recall(SAMPLE_DEVS, p1d.candidate_pairs(SAMPLE_DEVS, lsh))
+        self.assertEqual(n_exact, len(full))
+        self.assertAlmostEqual(recall, len(result) / len(full))
+        self.assertEqual(p1d.candidate_recall(SAMPLE_DEVS, []), (0.0, len(full)))
+        with self.assertRaises(ValueError):
+            p1d.MinHashLSH(bands=0)
+
+    def test_union_find(self):
+        """Union-find merges sets transitively and grows with new ids."""
+        union_find = p1d.UnionFind(3)
+        self.assertTrue(union_find.union(0, 1))
+        self.assertFalse(union_find.union(1, 0))
+        union_find.grow(5)
+        self.assertEqual(len(union_find), 5)
+        union_find.union(4, 1)
+        self.assertEqual(union_find.find(4), union_find.find(0))
+        self.assertNotEqual(union_find.find(2), union_find.find(0))
+
+    def test_identity_clusters(self):
+        """Filtered pairs are grouped into clusters and saved as aliases."""
+        clusters = p1d.IdentityClusters(SAMPLE_DEVS)
+        p1d.stream_similarity(p1d.iter_similarity(SAMPLE_DEVS), 0.7, "test_aliases",
+                              all_pairs=False, clusters=clusters)
+        df = pd.read_csv(os.path.join("project1devs", "test_aliases_similarity_t=0.7.csv"),
+                         keep_default_na=False)
+        # Every filtered pair ends up in the same cluster
+        index = {tuple(dev): i for i, dev in enumerate(SAMPLE_DEVS)}
+        cluster_of = {i: k for k, members in enumerate(clusters.clusters()) for i in members}
+        for row in df.itertuples(index=False):
+            self.assertEqual(cluster_of[index[(row.name_1, row.email_1)]],
+                             cluster_of[index[(row.name_2, row.email_2)]])
+
+        # Clusters grow incrementally with new developers and pairs
+        new_dev = ("New Dev", "new@example.com")
+        clusters.add_developers([new_dev, SAMPLE_DEVS[0]])
+        self.assertEqual(len(clusters.devs), len(SAMPLE_DEVS) + 1)
+        clusters.add_rows([new_dev + tuple(SAMPLE_DEVS[0])])
+        cluster = next(members for members in clusters.clusters() if 0 in members)
+        self.assertIn(len(SAMPLE_DEVS), cluster)
+
+        groups = p1d.write_aliases(clusters, "test_aliases")
+        aliases = pd.read_csv(os.path.join("project1devs", "test_aliases_aliases.csv"))
+        self.assertEqual(len(aliases), len(groups))
+        self.assertEqual(list(aliases["size"]), [len(members) for members in groups])
+        self.assertEqual([aliases["canonical_name"][0], aliases["canonical_email"][0]],
+                         SAMPLE_DEVS[groups[0][0]])
+
+    def test_stage_profiler(self):
+        """Nested stages are charged their exclusive time, counts add up."""
+        profiler = p1d.StageProfiler()
+        with profiler.stage("outer"):
+            self.assertEqual(list(profiler.timed(range(3), "inner")), [0, 1, 2])
+        profiler.count("pairs_scored", 10)
+        profiler.count("pairs_scored", 5)
+        report = profiler.report()
+        self.assertEqual(report["counts"], {"pairs_scored": 15})
+        self.assertEqual(report["stages"]["outer"]["calls"], 1)
+        self.assertEqual(report["stages"]["inner"]["calls"], 4)
+        stages = report["stages"]
+        self.assertLessEqual(stages["outer"]["wall_s"] + stages["inner"]["wall_s"],
+                             report["total_wall_s"])
+        self.assertIsNone(report["pairs_per_s"])
+        # The null profiler records nothing
+        null = p1d.NullProfiler()
+        items = [1, 2]
+        self.assertIs(null.timed(items, "inner"), items)
+        with null.stage("outer"), null.hot_loop():
+            null.count("pairs_scored")
+
+    def test_main_profile(self):
+        """--profile writes a JSON report of the stages, --profile-pstats a cProfile dump."""
+        p1d.save_developers_to_csv(SAMPLE_DEVS, "test_profile")
+        with patch('sys.argv', ['project1developers.py', '-f', 'test_profile',
+                                '--profile-pstats', '--filtered-only']):
+            p1d.main()
+        self.assertFalse(p1d._PROFILER.enabled)
+        with open(os.path.join("project1devs", "test_profile_profile.json"),
+                  encoding="utf-8") as f:
+            report = json.load(f)
+        n = len(SAMPLE_DEVS)
+        self.assertEqual(report["counts"]["identities"], n)
+        self.assertLessEqual(report["counts"]["pairs_kept"], report["counts"]["pairs_scored"])
+        self.assertTrue({"read_developers", "scoring", "dataframe", "write"}
+                        <= set(report["stages"]))
+        self.assertTrue(os.path.exists(os.path.join("project1devs",
+                                                    "test_profile_profile.pstats")))
+
+    def test_shards(self):
+        """Shards split the pairs evenly and merge into the output of a single run."""
+        pairs = p1d.PairRange(6, 0, 15)
+        self.assertEqual(list(pairs[4:9]), list(combinations(range(6), 2))[4:9])
+        self.assertEqual([p1d.shard_bounds(10, i, 3) for i in (1, 2, 3)], [(0, 3), (3, 6), (6, 10)])
+        self.assertEqual(p1d.parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "2"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                p1d.parse_shard(text)
+
+        outputfile = "test_shard"
+        for name in os.listdir("project1devs"):
+            if name.startswith(f"{outputfile}.shard-"):
+                os.remove(os.path.join("project1devs", name))
+        p1d.save_developers_to_csv(SAMPLE_DEVS, outputfile)
+        single = {}
+        for options in ([], ["-e", "vectorized", "-b", "lossless"]):
+            argv = ["project1developers.py", "-f", outputfile, *options]
+            with patch("sys.argv", argv):
+                p1d.main()
+            for name in ("_similarity.csv", "_similarity_t=0.7.csv"):
+                with open(os.path.join("project1devs", outputfile + name), "rb") as f:
+                    single[name] = f.read()
+            for shard in ("3/3", "1/3", "2/3"):
+                with patch("sys.argv", argv + ["--shard", shard]):
+                    p1d.main()
+            p1d.merge_shards(outputfile)
+            for name, expected in single.items():
+                with open(os.path.join("project1devs", outputfile + name), "rb") as f:
+                    self.assertEqual(f.read(), expected)
+
+        os.remove(os.path.join("project1devs", f"{outputfile}.shard-2-of-3.manifest.json"))
+        with self.assertRaisesRegex(ValueError, "Missing shards"):
+            p1d.merge_shards(outputfile)
+
+    def test_identity_index(self):
+        """The index finds the same matches as scoring the identity against everyone."""
+        devs = [tuple(dev) for dev in SAMPLE_DEVS]
+        queries = devs + [("Esimerkki Erkki", "ee@firma.com"), ("M Meikalainen", "maija@x.fi"),
+                          ("", "anon@example.com"), ("Nobody", "nobody@example.com")]
+        for t in (0.0, 0.5, 0.7, 0.9, 1.5):
+            index = p1d.IdentityIndex(devs, t)
+            for query in queries:
+                features = p1d.DeveloperFeatures([query] + devs)
+                expected = [b - 1 for b in range(1, len(devs) + 1)
+                            if p1d.score_pair_filtered(features, 0, b, t) is not None]
+                matches = index.match(*query)
+                self.assertEqual(sorted(b for b, _, _ in matches), expected)
+                scores = [score for _, _, score in matches]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+        with self.assertRaises(ValueError):
+            index.match("Erkki", "erkki@kuukkel.com", 0.7)
+
+    def test_match_service(self):
+        """The service answers single and batch queries over HTTP and reloads a changed CSV."""
+        outputfile = "test_service"
+        p1d.save_developers_to_csv(SAMPLE_DEVS[:4], outputfile)
+        service = p1d.MatchService(outputfile, 0.7)
+
+        async def request(port, method, path, body=None):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+                         "Connection: close\r\n\r\n".encode("latin-1") + data)
+            response = await reader.read()
+            writer.close()
+            head, _, payload = response.partition(b"\r\n\r\n")
+            return int(head.split()[1]), json.loads(payload)
+
+        async def scenario():
+            server = await service.start("127.0.0.1:0")
+            port = server.sockets[0].getsockname()[1]
+            try:
+                single = await request(port, "POST", "/match",
+                                       {"name": "Erkki Esimerkki", "email": "ee@x.fi"})
+                batch = await request(port, "POST", "/match", {"queries": [
+                    {"name": "Maija Meikäläinen", "email": "erkki@esimerkki.com"},
+                    {"name": "Nobody", "email": "nobody@example.com"}]})
+                bad = await request(port, "POST", "/match", {"name": "Erkki"})
+                low = await request(port, "POST", "/match", {"name": "Erkki", "email": "ee@x.fi",
+                                                             "threshold": 0.5})
+                bad_batch = await request(port, "POST", "/match", {"queries": [
+                    {"name": "Erkki", "email": "ee@x.fi"}, {"name": "Erkki"}]})
+                stats = await request(port, "GET", "/stats")
+            finally:
+                server.close()
+                await server.wait_closed()
+            return single, batch, (bad, low, bad_batch), stats
+
+        single, batch, bad, stats = asyncio.run(scenario())
+        self.assertEqual(single[0], 200)
+        self.assertEqual(sorted((m["name"], m["email"]) for m in single[1]["matches"]),
+                         sorted(tuple(dev) for dev in SAMPLE_DEVS[:3]))
+        self.assertEqual(set(single[1]["matches"][0]),
+                         {"name", "email", "score", "c1", "c2", "c3.1", "c3.2",
+                          "c4", "c5", "c6", "c7"})
+        self.assertEqual([len(result["matches"]) for result in batch[1]["results"]], [1, 0])
+        self.assertEqual([response[0] for response in bad], [400, 400, 400])
+        self.assertEqual(stats[1]["requests"], 2)
+        self.assertEqual(stats[1]["queries"], 3)
+        self.assertIsNotNone(stats[1]["latency_ms"]["p99"])
+
+        self.assertFalse(service.reload_if_changed())
+        p1d.save_developers_to_csv(SAMPLE_DEVS, outputfile)
+        os.utime(os.path.join("project1devs", f"{outputfile}.csv"), ns=(0, 10**9))
+        self.assertTrue(service.reload_if_changed())
+        self.assertEqual(service.handle("GET", "/health")[1]["developers"], len(SAMPLE_DEVS))
+
     def test_parse_args_defaults(self):
         """Test default arguments when no CLI args are provided."""
         with patch('sys.argv', ['project1developers.py']):
@@ -257,6 +1086,9 @@ class TestTestProject1Developers(unittest.TestCase):
             self.assertEqual(args.threshold, 0.7)
             self.assertEqual(args.file, 'devs')
             self.assertIsNone(args.repo)
+            self.assertIsNone(args.blocking)
+            self.assertEqual(args.workers, 1)
+            self.assertFalse(args.filtered_only)
 
     def test_parse_args_file_and_threshold(self):
         """Test parsing of both file and threshold arguments."""